@@ -0,0 +1,212 @@
+"""Micro-benchmarks of what error mapping adds to a route handler.
+
+Routes get a bare request handler that only awaits the endpoint: FastAPI's
+parameter parsing and the ASGI round trip are left out, so what is timed is
+the wrapper and the error path. Uses the public API only — to compare two
+commits, run the same script against each checkout:
+
+    git worktree add /tmp/before HEAD~1
+    PYTHONPATH=/tmp/before/src python benchmarks/error_path.py on_error
+    PYTHONPATH=src python benchmarks/error_path.py on_error
+
+Run: python benchmarks/error_path.py [case ...]
+"""
+
+import asyncio
+import functools
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, cast
+
+from fastapi.routing import APIRoute, APIRouter
+from pydantic import BaseModel
+from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response
+
+from fastapi_error_map import ErrorAwareRoute, ErrorAwareRouter, ErrorMap, rule
+
+ITERATIONS = 50_000
+REPEAT = 7
+
+
+class DomainError(Exception): ...
+
+
+class _BareRoute(APIRoute):
+    # the endpoint awaited directly, without FastAPI's request handling
+    def get_route_handler(self) -> Callable[..., Any]:
+        endpoint = self.endpoint
+
+        async def handler(_request: Request) -> Response:
+            return await endpoint()  # type: ignore[no-any-return]
+
+        return handler
+
+
+class _BenchRoute(ErrorAwareRoute, _BareRoute): ...
+
+
+def _mapped_handler(
+    error_map: ErrorMap, *, fail: bool = True, **policy: Any
+) -> Callable[[Request], Awaitable[Response]]:
+    router = ErrorAwareRouter(route_class=_BenchRoute, warn_on_unmapped=False, **policy)
+
+    @router.get("/", error_map=error_map)
+    async def endpoint() -> Response:
+        if fail:
+            raise DomainError("boom")
+        return Response()
+
+    route = cast("APIRoute", router.routes[0])
+    return route.get_route_handler()
+
+
+async def _best_of(handler: Callable[[Request], Awaitable[Response]]) -> float:
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+    best = float("inf")
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        for _ in range(ITERATIONS):
+            await handler(request)
+        best = min(best, time.perf_counter() - started)
+    return best / ITERATIONS
+
+
+def _report(rows: dict[str, Callable[[Request], Awaitable[Response]]]) -> None:
+    width = max(len(label) for label in rows)
+    for label, handler in rows.items():
+        seconds = asyncio.run(_best_of(handler))
+        sys.stdout.write(f"  {label:<{width}}  {seconds * 1e6:8.2f} us\n")
+
+
+def _plain_handler() -> Callable[[Request], Awaitable[Response]]:
+    router = APIRouter(route_class=_BareRoute)
+
+    @router.get("/")
+    async def endpoint() -> Response:
+        return Response()
+
+    route = cast("APIRoute", router.routes[0])
+    return route.get_route_handler()
+
+
+def success() -> None:
+    """Success path: a plain route against an error-mapped one that doesn't raise."""
+    _report(
+        {
+            "plain APIRoute": _plain_handler(),
+            "error-mapped": _mapped_handler(
+                {DomainError: status.HTTP_409_CONFLICT}, fail=False
+            ),
+        }
+    )
+
+
+def _noop(_err: Exception, *, tag: str = "", extra: str = "") -> None: ...
+
+
+class _Callback:
+    def __call__(self, err: Exception) -> None: ...
+
+
+def on_error() -> None:
+    """Dispatch of a sync on_error, wrapped in partials or a callable instance.
+
+    Prebuilt 5xx responses: what is left is the dispatch.
+    """
+    _report(
+        {
+            "partial(partial(fn))": _mapped_handler(
+                {
+                    DomainError: rule(
+                        status.HTTP_503_SERVICE_UNAVAILABLE,
+                        on_error=functools.partial(
+                            functools.partial(_noop, tag="a"), extra="b"
+                        ),
+                    )
+                }
+            ),
+            "callable instance": _mapped_handler(
+                {
+                    DomainError: rule(
+                        status.HTTP_503_SERVICE_UNAVAILABLE, on_error=_Callback()
+                    )
+                }
+            ),
+        }
+    )
+
+
+class OtherError(Exception): ...
+
+
+def variants() -> None:
+    """Raise to prebuilt 5xx, by map shape: the handler variant picked per route."""
+    unavailable = status.HTTP_503_SERVICE_UNAVAILABLE
+    _report(
+        {
+            "single entry": _mapped_handler({DomainError: unavailable}),
+            "two entries": _mapped_handler(
+                {DomainError: unavailable, OtherError: status.HTTP_409_CONFLICT}
+            ),
+            "static headers": _mapped_handler(
+                {
+                    DomainError: rule(unavailable, headers={"Retry-After": "30"}),
+                    OtherError: status.HTTP_409_CONFLICT,
+                }
+            ),
+        }
+    )
+
+
+class Detail(BaseModel):
+    field: str
+    reason: str
+
+
+class Problem(BaseModel):
+    code: str
+    message: str
+    details: list[Detail]
+
+
+def _problem(_err: Exception) -> Problem:
+    return Problem(
+        code="conflict",
+        message="order already shipped",
+        details=[Detail(field=f"line{i}", reason="shipped") for i in range(5)],
+    )
+
+
+def serialize() -> None:
+    """Encoding a nested BaseModel body: jsonable_encoder or serialize_by_model."""
+    error_map: ErrorMap = {
+        DomainError: rule(status.HTTP_409_CONFLICT, translator=_problem)
+    }
+    _report(
+        {
+            "jsonable_encoder": _mapped_handler(error_map),
+            "serialize_by_model": _mapped_handler(error_map, serialize_by_model=True),
+        }
+    )
+
+
+CASES: dict[str, Callable[[], None]] = {
+    "on_error": on_error,
+    "serialize": serialize,
+    "success": success,
+    "variants": variants,
+}
+
+
+def main(argv: list[str]) -> None:
+    for name in argv or list(CASES):
+        summary = (CASES[name].__doc__ or "").strip().splitlines()[0]
+        sys.stdout.write(f"{name}: {summary}\n")
+        CASES[name]()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
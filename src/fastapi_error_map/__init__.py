@@ -4,10 +4,39 @@ Declare on the route how exceptions map to HTTP responses;
 OpenAPI error docs follow from that declaration.
 """
 
-from fastapi_error_map.concurrency import to_threadpool
+from fastapi_error_map.coalescing import Coalescer
+from fastapi_error_map.concurrency import (
+    CallbackPool,
+    Dispatcher,
+    ProcessPool,
+    after_response,
+    limited,
+    sampled,
+    to_processpool,
+    to_threadpool,
+)
+from fastapi_error_map.events import ErrorEvent, EventRecorder
+from fastapi_error_map.journal import Journal, read_journal
+from fastapi_error_map.lifespan import shutdown
+from fastapi_error_map.limits import OnErrorLimit
+from fastapi_error_map.metrics import ErrorMetrics
+from fastapi_error_map.profiling import (
+    ErrorPathProfiler,
+    ErrorPathTimings,
+    PhaseProfiler,
+)
 from fastapi_error_map.route_config import error_map
 from fastapi_error_map.routing import ErrorAwareRoute, ErrorAwareRouter
 from fastapi_error_map.rules import ErrorMap, Rule, rule
+from fastapi_error_map.sampling import (
+    Sampler,
+    by_key,
+    first_then_every,
+    fixed_rate,
+)
+from fastapi_error_map.shared_metrics import SharedMetricsFile
+from fastapi_error_map.sinks import BatchSink
+from fastapi_error_map.tracing import Tracer
 from fastapi_error_map.translator_factories import (
     SimpleErrorResponse,
     StructuredErrorResponse,
@@ -15,30 +44,61 @@ from fastapi_error_map.translator_factories import (
     structured,
 )
 from fastapi_error_map.types_ import (
+    ConstantTranslator,
     ErrorMapWarning,
     Headers,
     OnError,
+    Renderer,
     RouteConfigError,
+    Serializer,
     Translator,
     TranslatorFactory,
 )
 
 __all__ = [
+    "BatchSink",
+    "CallbackPool",
+    "Coalescer",
+    "ConstantTranslator",
+    "Dispatcher",
     "ErrorAwareRoute",
     "ErrorAwareRouter",
+    "ErrorEvent",
     "ErrorMap",
     "ErrorMapWarning",
+    "ErrorMetrics",
+    "ErrorPathProfiler",
+    "ErrorPathTimings",
+    "EventRecorder",
     "Headers",
+    "Journal",
     "OnError",
+    "OnErrorLimit",
+    "PhaseProfiler",
+    "ProcessPool",
+    "Renderer",
     "RouteConfigError",
     "Rule",
+    "Sampler",
+    "Serializer",
+    "SharedMetricsFile",
     "SimpleErrorResponse",
     "StructuredErrorResponse",
+    "Tracer",
     "Translator",
     "TranslatorFactory",
+    "after_response",
+    "by_key",
     "error_map",
+    "first_then_every",
+    "fixed_rate",
+    "limited",
+    "read_journal",
     "rule",
+    "sampled",
+    "shutdown",
     "simple",
     "structured",
+    "to_processpool",
     "to_threadpool",
 ]
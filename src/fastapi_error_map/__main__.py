@@ -0,0 +1,58 @@
+"""Offline tools: ``python -m fastapi_error_map summarize <journal-dir>``."""
+
+import argparse
+import sys
+from collections import Counter
+from collections.abc import Sequence
+from typing import Final
+
+from fastapi_error_map.journal import read_journal
+
+_KEYS: Final[tuple[str, ...]] = ("route", "type", "status")
+
+
+def summarize(directory: str, by: Sequence[str], top: int | None) -> str:
+    counts: Counter[tuple[str, ...]] = Counter()
+    for event in read_journal(directory):
+        fields = {
+            "route": event.route or "-",
+            "type": event.type_name,
+            "status": "-" if event.status is None else str(event.status),
+        }
+        counts[tuple(fields[key] for key in by)] += event.repeats
+    rows = [(str(count), *key) for key, count in counts.most_common(top)]
+    header = ("count", *by)
+    widths = [max(map(len, column)) for column in zip(header, *rows, strict=False)]
+    lines = [
+        "  ".join(cell.ljust(width) for cell, width in zip(row, widths, strict=True))
+        for row in (header, *rows)
+    ]
+    lines.append(f"{sum(counts.values())} errors")
+    return "\n".join(line.rstrip() for line in lines) + "\n"
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m fastapi_error_map")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summarize_cmd = commands.add_parser(
+        "summarize", help="count journal records by route, type and status"
+    )
+    summarize_cmd.add_argument("directory", help="Journal directory")
+    summarize_cmd.add_argument(
+        "--by",
+        default=",".join(_KEYS),
+        help="comma-separated grouping keys (default: route,type,status)",
+    )
+    summarize_cmd.add_argument("--top", type=int, default=None, help="top N rows")
+    args = parser.parse_args(argv)
+
+    by = [key.strip() for key in args.by.split(",") if key.strip()]
+    unknown = sorted(set(by) - set(_KEYS))
+    if unknown or not by:
+        parser.error(f"--by takes {', '.join(_KEYS)}; got {args.by!r}")
+    sys.stdout.write(summarize(args.directory, by, args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
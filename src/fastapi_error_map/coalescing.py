@@ -0,0 +1,157 @@
+import asyncio
+import dataclasses
+import functools
+import hashlib
+import inspect
+import logging
+from collections.abc import Awaitable, Callable, Iterable
+from types import CodeType
+from typing import Final, NamedTuple
+
+from fastapi_error_map import lifespan
+from fastapi_error_map.events import ErrorEvent, EventRecorder
+
+logger = logging.getLogger("fastapi_error_map")
+
+DEFAULT_WINDOW_MS: Final[float] = 1000.0
+
+EventSink = Callable[[ErrorEvent], Awaitable[None] | None]
+
+# (route label, exception type, code object of the raising function)
+_Key = tuple[str | None, type[BaseException], CodeType | None]
+
+
+@functools.lru_cache(maxsize=1024)
+def _location(code: CodeType | None) -> str:
+    # once per code object: the only per-fingerprint string work
+    if code is None:
+        return "?"
+    name = getattr(code, "co_qualname", code.co_name)  # co_qualname: 3.11+
+    return f"{code.co_filename}:{name}:{code.co_firstlineno}"
+
+
+def _raising_code(err: BaseException) -> CodeType | None:
+    tb = err.__traceback__
+    if tb is None:
+        return None
+    while tb.tb_next is not None:
+        tb = tb.tb_next
+    return tb.tb_frame.f_code
+
+
+class CoalescerStats(NamedTuple):
+    """Counters of one ``Coalescer``: windows open now and lifetime outcomes."""
+
+    open: int
+    emitted: int
+    coalesced: int
+
+
+class _Window:
+    __slots__ = ("event", "repeats", "timer")
+
+    def __init__(self, event: ErrorEvent, timer: asyncio.TimerHandle) -> None:
+        self.event = event
+        self.repeats = 1
+        self.timer = timer
+
+
+class Coalescer(EventRecorder):
+    """``on_error`` that folds repeats of the same error into one ``ErrorEvent``.
+
+    Errors share a fingerprint when route, exception type and raising
+    function match. The first opens a ``window_ms`` window; repeats only
+    count; when it closes, ``sink`` gets one event with ``repeats`` set.
+    Open windows are emitted on app shutdown.
+    Matching costs a traceback walk and a dict lookup — no string formatting.
+
+    Example:
+        >>> alerts = Coalescer(send_alert, window_ms=5000)
+        >>> rule(503, on_error=alerts)
+    """
+
+    def __init__(
+        self,
+        sink: EventSink,
+        *,
+        window_ms: float = DEFAULT_WINDOW_MS,
+        attributes: Iterable[str] = (),
+        traceback: bool | int = False,
+    ) -> None:
+        self.sink = sink
+        self.window = window_ms / 1000
+        self.attributes = tuple(attributes)
+        self.traceback = traceback
+        self.emitted = 0
+        self.coalesced = 0
+        self._windows: dict[_Key, _Window] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def __call__(self, err: Exception) -> None:
+        # outside an error_map route there is no route label to key on
+        self.record(err, None, None)
+
+    def record(self, err: Exception, route: str | None, status: int | None) -> None:
+        code = _raising_code(err)
+        key: _Key = (route, type(err), code)
+        window = self._windows.get(key)
+        if window is not None:
+            window.repeats += 1
+            self.coalesced += 1
+            return
+        loop = asyncio.get_running_loop()
+        timer = loop.call_later(self.window, self._close, key)
+        self._windows[key] = _Window(self._capture(err, key, status), timer)
+        lifespan.track(self, self.aclose)
+
+    def _capture(self, err: Exception, key: _Key, status: int | None) -> ErrorEvent:
+        route, exc_type, code = key
+        fingerprint = hashlib.blake2b(
+            f"{route}|{exc_type.__module__}.{exc_type.__qualname__}|"
+            f"{_location(code)}".encode(),
+            digest_size=8,
+        ).hexdigest()
+        return ErrorEvent.capture(
+            err,
+            attributes=self.attributes,
+            traceback=self.traceback,
+            route=route,
+            status=status,
+            fingerprint=fingerprint,
+        )
+
+    def _close(self, key: _Key) -> None:
+        window = self._windows.pop(key)
+        window.timer.cancel()
+        self.emitted += 1
+        event = dataclasses.replace(window.event, repeats=window.repeats)
+        try:
+            result = self.sink(event)
+        except Exception:
+            logger.warning("Coalescer sink failed — event lost", exc_info=True)
+            return
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(self._await(result))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _await(self, result: Awaitable[None]) -> None:
+        try:
+            await result
+        except Exception:
+            logger.warning("Coalescer sink failed — event lost", exc_info=True)
+
+    async def aclose(self) -> None:
+        """Emit every open window now and wait for async sinks."""
+        lifespan.untrack(self)
+        for key in list(self._windows):
+            self._close(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    def stats(self) -> CoalescerStats:
+        return CoalescerStats(
+            open=len(self._windows),
+            emitted=self.emitted,
+            coalesced=self.coalesced,
+        )
@@ -1,13 +1,30 @@
+import asyncio
+import collections
+import enum
 import functools
 import inspect
+import logging
+import multiprocessing
+import pickle
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from typing import Any, ClassVar, Final, Literal, NamedTuple, get_args
 
+import anyio
+import anyio.to_thread
 from starlette.concurrency import run_in_threadpool
 
-from fastapi_error_map.types_ import OnError, RouteConfigError
+from fastapi_error_map import lifespan
+from fastapi_error_map.events import ErrorEvent, EventRecorder
+from fastapi_error_map.limits import OnErrorLimit
+from fastapi_error_map.sampling import Sampler
+from fastapi_error_map.types_ import OnError, RouteConfigError, RouteLabel
 
+logger = logging.getLogger("fastapi_error_map")
 
-def _is_async_callable(on_error: OnError) -> bool:
+
+def is_async_callable(on_error: Callable[..., Any]) -> bool:
     while isinstance(on_error, functools.partial):
         on_error = on_error.func
     if inspect.iscoroutinefunction(on_error):
@@ -17,38 +34,528 @@ def _is_async_callable(on_error: OnError) -> bool:
     return inspect.iscoroutinefunction(call)
 
 
+Saturation = Literal["wait", "drop", "inline"]
+
+DEFAULT_POOL_THREADS: Final[int] = 4
+DEFAULT_POOL_QUEUE: Final[int] = 1024
+
+
+class CallbackPoolStats(NamedTuple):
+    """Counters of one ``CallbackPool``: current load and lifetime outcomes."""
+
+    running: int
+    queued: int
+    completed: int
+    dropped: int
+    inlined: int
+
+
+class CallbackPool:
+    """Threads reserved for offloaded ``on_error`` callbacks.
+
+    ``to_threadpool`` without a pool shares AnyIO's default limiter with sync
+    endpoints; a pool caps callbacks at ``max_threads`` of their own, so an
+    error storm can't starve the endpoints of threads.
+    When every thread is busy, ``saturation`` decides:
+    ``"wait"`` queues up to ``max_queued`` callbacks and drops past that,
+    ``"drop"`` skips the callback, ``"inline"`` runs it on the loop.
+
+    Example:
+        >>> audit = CallbackPool("audit", max_threads=2, saturation="drop")
+        >>> rule(503, on_error=to_threadpool(write_audit_log, pool=audit))
+        >>> audit.stats().dropped
+        0
+    """
+
+    _named: ClassVar[dict[str, "CallbackPool"]] = {}
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_threads: int = DEFAULT_POOL_THREADS,
+        saturation: Saturation = "wait",
+        max_queued: int = DEFAULT_POOL_QUEUE,
+    ) -> None:
+        if max_threads < 1:
+            raise RouteConfigError(f"pool {name!r}: max_threads must be at least 1")
+        if max_queued < 0:
+            raise RouteConfigError(f"pool {name!r}: max_queued can't be negative")
+        if saturation not in get_args(Saturation):
+            raise RouteConfigError(
+                f"pool {name!r}: saturation must be one of {get_args(Saturation)}"
+            )
+        self.name = name
+        self.max_threads = max_threads
+        self.saturation = saturation
+        self.max_queued = max_queued
+        self.completed = 0
+        self.dropped = 0
+        self.inlined = 0
+        # created on first use: older AnyIO binds a limiter to the running loop
+        self._limiter: Any = None
+
+    @classmethod
+    def named(cls, name: str) -> "CallbackPool":
+        """Library-managed pool with default settings, one per name."""
+        pool = cls._named.get(name)
+        if pool is None:
+            pool = cls._named[name] = cls(name)
+        return pool
+
+    def stats(self) -> CallbackPoolStats:
+        running = queued = 0
+        if self._limiter is not None:
+            running = int(self._limiter.borrowed_tokens)
+            queued = self._limiter.statistics().tasks_waiting
+        return CallbackPoolStats(
+            running=running,
+            queued=queued,
+            completed=self.completed,
+            dropped=self.dropped,
+            inlined=self.inlined,
+        )
+
+    async def run(self, target: OnError, err: Exception) -> None:
+        limiter = self._limiter
+        if limiter is None:
+            limiter = self._limiter = anyio.CapacityLimiter(self.max_threads)
+        if limiter.available_tokens < 1:
+            if self.saturation == "inline":
+                self.inlined += 1
+                target(err)
+                return
+            if (
+                self.saturation == "drop"
+                or limiter.statistics().tasks_waiting >= self.max_queued
+            ):
+                self.dropped += 1
+                return
+        await anyio.to_thread.run_sync(target, err, limiter=limiter)
+        self.completed += 1
+
+    def __repr__(self) -> str:
+        return (
+            f"CallbackPool({self.name!r}, max_threads={self.max_threads}, "
+            f"saturation={self.saturation!r})"
+        )
+
+
 @dataclass(frozen=True, slots=True)
-class _Offloaded:
+class _Marker:
+    # wraps an on_error with how to run it; compile_on_error unwraps it
     wrapped: OnError
 
     def __call__(self, err: Exception) -> None:  # noqa: ARG002
-        raise TypeError("_Offloaded is a marker, not callable")
+        raise TypeError(f"{type(self).__name__} is a marker, not callable")
+
 
+@dataclass(frozen=True, slots=True)
+class _Offloaded(_Marker):
+    pool: CallbackPool | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class _AfterResponse(_Marker): ...
+
+
+@dataclass(frozen=True, slots=True)
+class _Sampled(_Marker):
+    sampler: Sampler
 
-def to_threadpool(on_error: OnError) -> OnError:
+
+@dataclass(frozen=True, slots=True)
+class _Limited(_Marker):
+    limit: OnErrorLimit
+
+
+@dataclass(frozen=True, slots=True)
+class _Queued(_Marker):
+    dispatcher: "Dispatcher"
+
+
+def to_threadpool(
+    on_error: OnError,
+    *,
+    pool: CallbackPool | str | None = None,
+) -> OnError:
     """Mark a blocking sync ``on_error`` to run in a threadpool, off the loop.
 
     For a sync callback that blocks (sync HTTP, disk): keeps it from stalling
     the loop for other requests. The response still awaits it, so latency is
-    unchanged — to answer without waiting, schedule the work instead.
+    unchanged — to answer without waiting, wrap it in ``after_response`` too.
     Sync runs inline by default; async runs inline always, offloading one raises.
 
+    ``pool`` gives it threads apart from sync endpoints: a ``CallbackPool``,
+    or a name for a library-managed one (``CallbackPool.named``).
+    Without it, it shares Starlette's threadpool.
+
     Example:
-        >>> rule(503, on_error=to_threadpool(write_audit_log))
+        >>> rule(503, on_error=to_threadpool(write_audit_log, pool="audit"))
     """
     if isinstance(on_error, _Offloaded):
         raise RouteConfigError("to_threadpool applied twice to the same on_error")
-    if _is_async_callable(on_error):
+    if isinstance(on_error, EventRecorder):
+        raise RouteConfigError(f"{on_error!r} records on the loop; nothing to offload")
+    if isinstance(on_error, _Marker):
+        raise RouteConfigError(
+            "to_threadpool must go inside other markers: "
+            "after_response(to_threadpool(on_error))"
+        )
+    if is_async_callable(on_error):
         raise RouteConfigError("cannot offload an async on_error — it runs inline")
-    return _Offloaded(on_error)
+    if isinstance(pool, str):
+        pool = CallbackPool.named(pool)
+    return _Offloaded(on_error, pool)
+
+
+class ProcessPool:
+    """Worker processes for CPU-bound ``on_error`` callbacks (``to_processpool``).
+
+    Started on the first error that needs it, stopped by the library's
+    ``shutdown()`` — ``ErrorAwareRouter`` registers it, so pools live
+    as long as the app; with a custom ``lifespan``, await it on the way out.
+    Workers are spawned, not forked: the server process runs threads.
+
+    Example:
+        >>> heavy = ProcessPool(max_workers=2)
+        >>> rule(500, on_error=to_processpool(fingerprint_crash, pool=heavy))
+    """
+
+    def __init__(self, *, max_workers: int | None = None) -> None:
+        self.max_workers = max_workers
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            lifespan.track(self, self.shutdown)
+        return self._executor
+
+    def shutdown(self) -> None:
+        # waits for submitted callbacks; the next error starts it again
+        executor, self._executor = self._executor, None
+        lifespan.untrack(self)
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_DEFAULT_PROCESS_POOL: Final[ProcessPool] = ProcessPool()
+
+
+@dataclass(frozen=True, slots=True)
+class _ProcessOffloaded:
+    # async on the loop side: snapshot, submit, await the worker's result
+    wrapped: Callable[[ErrorEvent], Any]
+    pool: ProcessPool
+    attributes: tuple[str, ...]
+
+    async def __call__(self, err: Exception) -> None:
+        event = ErrorEvent.capture(err, attributes=self.attributes)
+        await asyncio.get_running_loop().run_in_executor(
+            self.pool.executor(), self.wrapped, event
+        )
+
+
+def to_processpool(
+    on_error: Callable[[ErrorEvent], Any],
+    *,
+    pool: ProcessPool | None = None,
+    attributes: Iterable[str] = (),
+) -> OnError:
+    """Run a CPU-bound sync callback in a worker process, outside the GIL.
 
+    The callback gets an ``ErrorEvent`` — type name, args, the named
+    ``attributes`` and the formatted traceback — not the exception itself.
+    It must pickle by reference (module-level function, or a partial of one);
+    anything else fails here, at route build. The response awaits it, as
+    with ``to_threadpool``; wrap it in ``after_response`` to answer first.
 
-async def run_on_error(on_error: OnError, err: Exception) -> None:
+    Example:
+        >>> rule(500, on_error=to_processpool(fingerprint_crash, attributes=("code",)))
+    """
+    if isinstance(on_error, (_Marker, _ProcessOffloaded)):
+        raise RouteConfigError(
+            "to_processpool takes the plain callback; "
+            "after_response goes outside: after_response(to_processpool(on_error))"
+        )
+    if is_async_callable(on_error):
+        raise RouteConfigError("to_processpool needs a sync callback")
+    try:
+        pickle.dumps(on_error)
+    except (pickle.PicklingError, AttributeError, TypeError) as err:
+        raise RouteConfigError(
+            f"to_processpool: {on_error!r} can't be sent to a worker process — "
+            f"use a module-level function — {err}"
+        ) from err
+    return _ProcessOffloaded(on_error, pool or _DEFAULT_PROCESS_POOL, tuple(attributes))
+
+
+def after_response(on_error: OnError) -> OnError:
+    """Mark ``on_error`` to run after the response is sent, not before.
+
+    The client gets the error response without waiting for the callback —
+    slow sinks (audit, alerting) leave response latency alone.
+    Runs as the response's background task; sync or async.
+    Sync runs on the loop; combine with ``to_threadpool`` if it blocks.
+    A failure is logged, as inline; the response is already sent.
+
+    Example:
+        >>> rule(503, on_error=after_response(to_threadpool(write_audit_log)))
+    """
+    if isinstance(on_error, _AfterResponse):
+        raise RouteConfigError("after_response applied twice to the same on_error")
+    if isinstance(on_error, _Queued):
+        raise RouteConfigError("a dispatcher already runs on_error off the response")
+    return _AfterResponse(on_error)
+
+
+def sampled(on_error: OnError, sampler: Sampler) -> OnError:
+    """Call ``on_error`` only for the errors ``sampler`` lets through.
+
+    Decided before any dispatch work — thread, queue, background task.
+    The response is the same either way; ``sampler.stats()`` counts
+    admitted and skipped calls, so totals stay exact. Policies:
+    ``fixed_rate``, ``first_then_every``, ``by_key``.
+
+    Example:
+        >>> rule(503, on_error=sampled(after_response(page_oncall), fixed_rate(0.01)))
+    """
+    if isinstance(on_error, _Sampled):
+        raise RouteConfigError("sampled applied twice to the same on_error")
+    return _Sampled(on_error, sampler)
+
+
+def limited(on_error: OnError, limit: OnErrorLimit) -> OnError:
+    """Bound an async ``on_error`` by ``limit``: a timeout and a concurrency cap.
+
+    A hung sink can't hold failing requests open past the timeout, and a
+    storm can't pile up more than ``max_concurrency`` calls. Sync callbacks
+    can't be interrupted — make them async, or use ``to_processpool``.
+
+    Example:
+        >>> rule(503, on_error=limited(push_metrics, OnErrorLimit(timeout=0.5)))
+    """
+    if isinstance(on_error, _Limited):
+        raise RouteConfigError("limited applied twice to the same on_error")
+    if compile_on_error(on_error).mode is not DispatchMode.INLINE_ASYNC:
+        raise RouteConfigError(
+            f"limited needs an async on_error; {on_error!r} can't be cancelled"
+        )
+    return _Limited(on_error, limit)
+
+
+class DispatchMode(enum.Enum):
+    INLINE_SYNC = enum.auto()
+    INLINE_ASYNC = enum.auto()
+    OFFLOADED = enum.auto()
+
+
+class OnErrorDispatch(NamedTuple):
+    mode: DispatchMode
+    target: OnError  # marker unwrapped: what actually gets called
+    after_response: bool = False
+    pool: CallbackPool | None = None  # OFFLOADED only; None is Starlette's threadpool
+    dispatcher: "Dispatcher | None" = None  # queued for its workers, not awaited
+    sampler: Sampler | None = None  # asked first; skipped calls cost nothing more
+    recorder: EventRecorder | None = None  # fed route and status, no dispatch
+    limit: OnErrorLimit | None = None  # timeout and concurrency cap around the call
+
+
+def compile_on_error(on_error: OnError) -> OnErrorDispatch:  # noqa: PLR0911
+    # compile time: partial unwrapping and coroutine checks stay off the error path
+    if isinstance(on_error, _Limited):
+        return compile_on_error(on_error.wrapped)._replace(limit=on_error.limit)
+    if isinstance(on_error, _AfterResponse):
+        return compile_on_error(on_error.wrapped)._replace(after_response=True)
+    if isinstance(on_error, _Sampled):
+        return compile_on_error(on_error.wrapped)._replace(sampler=on_error.sampler)
+    if isinstance(on_error, _Queued):
+        return compile_on_error(on_error.wrapped)._replace(
+            dispatcher=on_error.dispatcher
+        )
     if isinstance(on_error, _Offloaded):
-        await run_in_threadpool(on_error.wrapped, err)
-    elif _is_async_callable(on_error):
-        result = on_error(err)
+        return OnErrorDispatch(
+            DispatchMode.OFFLOADED, on_error.wrapped, pool=on_error.pool
+        )
+    if isinstance(on_error, EventRecorder):
+        return OnErrorDispatch(DispatchMode.INLINE_SYNC, on_error, recorder=on_error)
+    mode = (
+        DispatchMode.INLINE_ASYNC
+        if is_async_callable(on_error)
+        else DispatchMode.INLINE_SYNC
+    )
+    return OnErrorDispatch(mode, on_error)
+
+
+class FanOut(NamedTuple):
+    # on_error=[...]: each sink compiled on its own, markers included
+    dispatches: tuple[OnErrorDispatch, ...]
+
+
+def compile_on_errors(
+    on_error: OnError | Sequence[OnError],
+) -> OnErrorDispatch | FanOut:
+    if callable(on_error):
+        return compile_on_error(on_error)
+    if not all(callable(sink) for sink in on_error):
+        raise RouteConfigError("on_error list takes callables; lists don't nest")
+    if len(on_error) == 1:
+        return compile_on_error(on_error[0])
+    return FanOut(tuple(compile_on_error(sink) for sink in on_error))
+
+
+async def run_on_error(dispatch: OnErrorDispatch, err: Exception) -> None:
+    if dispatch.limit is None:
+        await _invoke(dispatch, err)
+    else:
+        await dispatch.limit.run(_invoke, dispatch, err)
+
+
+async def _invoke(dispatch: OnErrorDispatch, err: Exception) -> None:
+    mode, target, pool = dispatch.mode, dispatch.target, dispatch.pool
+    if mode is DispatchMode.INLINE_SYNC:
+        target(err)
+    elif mode is DispatchMode.INLINE_ASYNC:
+        result = target(err)
         if inspect.isawaitable(result):
             await result
+    elif pool is None:
+        await run_in_threadpool(target, err)
     else:
-        on_error(err)
+        await pool.run(target, err)
+
+
+class DispatcherStats(NamedTuple):
+    """Counters of one ``Dispatcher``, keyed by status class (``"5xx"``, ``"4xx"``)."""
+
+    queued: dict[str, int]
+    dropped: dict[str, int]
+    completed: int
+
+
+class Dispatcher:
+    """App-scoped queue for ``on_error`` work, run by a fixed set of worker tasks.
+
+    ``queued(on_error)`` marks a callback: the response doesn't wait, the
+    callback joins the queue of its rule's status class, and workers take
+    5xx before 4xx before the rest. When ``max_queued`` callbacks wait,
+    a new one evicts the oldest of a lower class, or is dropped itself;
+    drops are counted per class. App shutdown runs what is queued.
+
+    Example:
+        >>> alerts = Dispatcher(workers=2, max_queued=1000)
+        >>> rule(503, on_error=alerts.queued(page_oncall))
+        >>> rule(404, on_error=alerts.queued(to_threadpool(write_audit_log)))
+    """
+
+    def __init__(self, *, workers: int = 1, max_queued: int = 1000) -> None:
+        if workers < 1:
+            raise RouteConfigError("Dispatcher needs at least 1 worker")
+        self.workers = workers
+        self.max_queued = max_queued
+        self.completed = 0
+        self.dropped: collections.Counter[str] = collections.Counter()
+        # status class (5 for 5xx) -> FIFO; workers scan from the highest class
+        self._queues: dict[
+            int, collections.deque[tuple[OnErrorDispatch, Exception, RouteLabel]]
+        ] = {}
+        self._size = 0
+        self._wakeup = asyncio.Event()
+        self._workers: list[asyncio.Task[None]] = []
+        self._closing = False
+
+    def queued(self, on_error: OnError) -> OnError:
+        if isinstance(on_error, (_AfterResponse, _Queued)):
+            raise RouteConfigError(
+                "dispatcher.queued takes on_error without after_response "
+                "or another dispatcher"
+            )
+        return _Queued(on_error, self)
+
+    def submit(
+        self, dispatch: OnErrorDispatch, err: Exception, status: int, label: RouteLabel
+    ) -> None:
+        level = status // 100
+        if self._size >= self.max_queued and not self._evict_below(level):
+            self.dropped[f"{level}xx"] += 1
+            return
+        queue = self._queues.get(level)
+        if queue is None:
+            queue = self._queues[level] = collections.deque()
+            self._queues = dict(sorted(self._queues.items(), reverse=True))
+        queue.append((dispatch, err, label))
+        self._size += 1
+        if not self._workers:
+            self._start()
+        self._wakeup.set()
+
+    def _evict_below(self, level: int) -> bool:
+        for lower in reversed(self._queues):
+            if lower >= level:
+                return False
+            queue = self._queues[lower]
+            if queue:
+                queue.popleft()
+                self._size -= 1
+                self.dropped[f"{lower}xx"] += 1
+                return True
+        return False
+
+    def _start(self) -> None:
+        self._closing = False
+        self._wakeup = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        self._workers = [loop.create_task(self._work()) for _ in range(self.workers)]
+        lifespan.track(self, self.aclose)
+
+    def _next(self) -> tuple[OnErrorDispatch, Exception, RouteLabel] | None:
+        for queue in self._queues.values():
+            if queue:
+                self._size -= 1
+                return queue.popleft()
+        return None
+
+    async def _work(self) -> None:
+        while True:
+            item = self._next()
+            if item is None:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            dispatch, err, label = item
+            try:
+                await run_on_error(dispatch, err)
+            except Exception:
+                logger.warning(
+                    "on_error failed on %s — response unaffected",
+                    label,
+                    exc_info=True,
+                )
+            self.completed += 1
+
+    async def aclose(self) -> None:
+        """Run what is queued, then stop the workers; the next error restarts them."""
+        lifespan.untrack(self)
+        if not self._workers:
+            return
+        self._closing = True
+        self._wakeup.set()
+        workers, self._workers = self._workers, []
+        await asyncio.gather(*workers)
+
+    def stats(self) -> DispatcherStats:
+        return DispatcherStats(
+            queued={f"{level}xx": len(queue) for level, queue in self._queues.items()},
+            dropped=dict(self.dropped),
+            completed=self.completed,
+        )
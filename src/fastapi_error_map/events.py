@@ -0,0 +1,129 @@
+import time
+import traceback as tb
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any, Final
+
+# kept as-is in a snapshot; anything else becomes its repr(), so pickling can't fail
+_PLAIN: Final[frozenset[type]] = frozenset(
+    {str, int, float, bool, bytes, type(None)},
+)
+
+
+def _plain(value: Any) -> Any:
+    if type(value) in _PLAIN:
+        return value
+    try:
+        return repr(value)
+    except Exception:  # a broken __repr__ must not cost the snapshot
+        return f"<unprintable {type(value).__name__}>"
+
+
+def _attributes(err: BaseException, names: Iterable[str]) -> dict[str, Any]:
+    captured: dict[str, Any] = {}
+    for name in names:
+        try:
+            value = getattr(err, name)
+        except AttributeError:
+            continue
+        except Exception:  # a raising property, like a broken __str__
+            value = f"<unreadable {name}>"
+        captured[name] = _plain(value)
+    return captured
+
+
+def _message(err: BaseException) -> str:
+    try:
+        return str(err)
+    except Exception:  # a broken __str__ must not cost the snapshot
+        return f"<unprintable {type(err).__name__}>"
+
+
+def _format_traceback(err: BaseException, frames: bool | int) -> str | None:
+    if frames is False or frames <= 0:
+        return None
+    # negative limit: the innermost frames, where the error was raised
+    limit = None if frames is True else -frames
+    return "".join(tb.format_exception(type(err), err, err.__traceback__, limit=limit))
+
+
+def release_frames(err: BaseException) -> None:
+    """Clear the locals of finished frames in ``err``'s traceback and chain.
+
+    The traceback stays formattable; what the frames referenced — request
+    bodies, sessions — is freed now, not when the exception is.
+    Frames still running are skipped.
+    """
+    seen: set[int] = set()
+    current: BaseException | None = err
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        tb.clear_frames(current.__traceback__)
+        current = current.__cause__ or current.__context__
+
+
+@dataclass(frozen=True, slots=True)
+class ErrorEvent:
+    """Picklable snapshot of a handled exception, for sinks outside the request.
+
+    Holds no reference to the exception, its traceback or frames:
+    safe to queue, batch or send to another process.
+    ``traceback`` is ``True`` for the full formatted traceback, ``False``
+    for none, or a number N for the innermost N frames only.
+
+    Example:
+        >>> event = ErrorEvent.capture(err, attributes=("code",), traceback=5)
+        >>> event.type_name, event.message, event.attributes
+        ('app.errors.PaymentError', 'declined', {'code': 'card_declined'})
+    """
+
+    type_name: str
+    args: tuple[Any, ...]
+    message: str = ""
+    attributes: dict[str, Any] = field(default_factory=dict)
+    traceback: str | None = None
+    route: str | None = None
+    status: int | None = None
+    timestamp: float = 0.0  # time.time() at capture
+    fingerprint: str | None = None
+    repeats: int = 1  # occurrences folded into this event by coalescing
+
+    @classmethod
+    def capture(
+        cls,
+        err: BaseException,
+        *,
+        attributes: Iterable[str] = (),
+        traceback: bool | int = True,
+        route: str | None = None,
+        status: int | None = None,
+        fingerprint: str | None = None,
+    ) -> "ErrorEvent":
+        exc_type = type(err)
+        return cls(
+            type_name=f"{exc_type.__module__}.{exc_type.__qualname__}",
+            args=tuple(_plain(arg) for arg in err.args),
+            message=_message(err),
+            attributes=_attributes(err, attributes),
+            traceback=_format_traceback(err, traceback),
+            route=route,
+            status=status,
+            timestamp=time.time(),
+            fingerprint=fingerprint,
+        )
+
+
+class EventRecorder(ABC):
+    """Base of ``on_error`` sinks the handler feeds directly, with route and status.
+
+    Opt-in by subclassing: ``record`` runs on the loop instead of being
+    dispatched, so it must not block; what it raises is logged.
+    ``BatchSink``, ``Coalescer`` and ``Journal`` are recorders.
+    """
+
+    @abstractmethod
+    def __call__(self, err: Exception, /) -> Any: ...
+
+    @abstractmethod
+    def record(self, err: Exception, route: str | None, status: int | None) -> None: ...
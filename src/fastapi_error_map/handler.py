@@ -1,93 +1,606 @@
+import asyncio
 import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from typing import Any, Final
 
-from fastapi.encoders import jsonable_encoder
+import anyio
+from starlette.background import BackgroundTask
 from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
+from starlette.responses import Response
 
-from fastapi_error_map.concurrency import run_on_error
+from fastapi_error_map import lifespan
+from fastapi_error_map.concurrency import FanOut, OnErrorDispatch, run_on_error
+from fastapi_error_map.events import release_frames
 from fastapi_error_map.framework import is_framework_exception
-from fastapi_error_map.rules import CompiledErrorMap, ResolvedRule
+from fastapi_error_map.metrics import RouteErrorMetrics
+from fastapi_error_map.profiling import (
+    SERVER_TIMING,
+    ErrorPathProfiler,
+    ErrorPathTimings,
+    server_timing_header,
+)
+from fastapi_error_map.resolution import ResolutionCache
+from fastapi_error_map.rules import ResolvedRule
+from fastapi_error_map.sampling import Sampler
+from fastapi_error_map.tracing import Tracer, route_attributes
 from fastapi_error_map.types_ import RouteHandler, RouteLabel
 
 logger = logging.getLogger("fastapi_error_map")
 logger.addHandler(logging.NullHandler())
 
+# one unmapped warning per (route, exception type) per interval; the rest counted
+UNMAPPED_WARNING_INTERVAL: Final[float] = 60.0
+# exception types with an open window per route; past it, the oldest is dropped
+UNMAPPED_WARNING_TYPES: Final[int] = 256
+
+# request scope key: when the endpoint started, for the Server-Timing header
+_ENDPOINT_STARTED: Final[str] = "fastapi_error_map.endpoint_started"
+
+
+class _WarningWindow:
+    __slots__ = ("started", "suppressed")
+
+    def __init__(self, started: float) -> None:
+        self.started = started
+        self.suppressed = 0
+
+
+def _asyncio_loop() -> asyncio.AbstractEventLoop | None:
+    # None on AnyIO's other backend (trio): no asyncio loop to set timers on
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class _UnmappedWarnings:
+    # One per route, keyed by exception type, oldest window first. A timer
+    # summarizes what a window suppressed once it closes, so a storm that
+    # stops is still reported; app shutdown reports windows still open.
+    # Without an asyncio loop there is no timer: the next warning reports.
+
+    def __init__(
+        self,
+        route_label: RouteLabel,
+        interval: float,
+        max_types: int,
+    ) -> None:
+        self.route_label = route_label
+        self.interval = interval
+        self.max_types = max_types
+        self._windows: dict[type[Exception], _WarningWindow] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._scheduled = False  # a summary is due: timer set, or lazy on trio
+
+    def warn(self, exc_type: type[Exception]) -> None:
+        now = time.monotonic()
+        window = self._windows.get(exc_type)
+        if window is not None and now - window.started < self.interval:
+            window.suppressed += 1
+            if not self._scheduled:
+                self._schedule(now)
+            return
+        if window is not None:
+            # reopened at the end, keeping the dict in window order
+            del self._windows[exc_type]
+            if window.suppressed:  # the timer is late, or there is none
+                self._summarize(exc_type, window, self.interval)
+        elif len(self._windows) >= self.max_types:
+            oldest_type = next(iter(self._windows))
+            oldest = self._windows.pop(oldest_type)
+            if oldest.suppressed:
+                self._summarize(oldest_type, oldest, now - oldest.started)
+        logger.warning(
+            "Unmapped %s on %s — add it to error_map or handle it globally",
+            exc_type.__name__,
+            self.route_label,
+        )
+        self._windows[exc_type] = _WarningWindow(now)
+
+    def _schedule(self, now: float) -> None:
+        self._scheduled = True
+        lifespan.track(self, self.flush)
+        loop = _asyncio_loop()
+        if loop is None:
+            # no timer: summaries go out when the type shows up again, or at shutdown
+            return
+        # the oldest window closes first
+        closes = next(iter(self._windows.values())).started + self.interval
+        self._timer = loop.call_later(max(closes - now, 0), self._close_windows)
+
+    def _close_windows(self) -> None:
+        self._timer = None
+        self._scheduled = False
+        now = time.monotonic()
+        while self._windows:
+            exc_type, window = next(iter(self._windows.items()))
+            if now - window.started < self.interval:
+                break
+            del self._windows[exc_type]
+            if window.suppressed:
+                self._summarize(exc_type, window, self.interval)
+        if any(window.suppressed for window in self._windows.values()):
+            self._schedule(now)
+        else:
+            lifespan.untrack(self)
+
+    def _summarize(
+        self, exc_type: type[Exception], window: _WarningWindow, seconds: float
+    ) -> None:
+        logger.warning(
+            "Unmapped %s on %s — suppressed %d occurrences in last %.0fs",
+            exc_type.__name__,
+            self.route_label,
+            window.suppressed,
+            seconds,
+        )
+        window.suppressed = 0
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._scheduled = False
+        lifespan.untrack(self)
+        now = time.monotonic()
+        for exc_type, window in self._windows.items():
+            if window.suppressed:
+                seconds = min(now - window.started, self.interval)
+                self._summarize(exc_type, window, seconds)
+
+
+class _ErrorPath:
+    # What runs once the endpoint raised; the success path never touches it.
+    # wrap_route_handler picks the leanest variant the compiled map allows.
 
-class _ErrorHandlingHandler:
     def __init__(
         self,
-        original: RouteHandler,
         *,
-        compiled: CompiledErrorMap,
+        resolution: ResolutionCache,
         warn_on_unmapped: bool,
         route_label: RouteLabel,
+        tracer: Tracer | None = None,
     ) -> None:
-        self.original = original
-        self.compiled = compiled
-        self.warn_on_unmapped = warn_on_unmapped
+        self.resolution = resolution
         self.route_label = route_label
+        self.unmapped_warnings = (
+            _UnmappedWarnings(
+                route_label, UNMAPPED_WARNING_INTERVAL, UNMAPPED_WARNING_TYPES
+            )
+            if warn_on_unmapped
+            else None
+        )
+        self.tracer = tracer
+        # bound once: a tracer call allocates nothing per error;
+        # attributes are built once per route, like the per-rule ones on ResolvedRule
+        self.trace_translated = None if tracer is None else tracer.translated
+        self.trace_unmapped = None if tracer is None else tracer.unmapped
+        self.trace_passed_through = None if tracer is None else tracer.passed_through
+        self.unmapped_attributes = route_attributes(route_label, "unmapped")
+        self.passed_through_attributes = route_attributes(route_label, "passed_through")
 
-    async def __call__(self, request: Request) -> Response:
-        try:
-            return await self.original(request)
-        except Exception as err:
-            if is_framework_exception(err):
-                raise
-            resolved = self._resolve(type(err))
-            if resolved is None:
-                self._log_unmapped(err)
-                raise
-            return await self._translate(resolved, err)
-
-    def _resolve(self, exc_type: type[Exception]) -> ResolvedRule | None:
-        ancestor: type[Exception]
-        for ancestor in exc_type.__mro__:
-            resolved = self.compiled.get(ancestor)
-            if resolved is not None:
-                return resolved
-        return None
+    def _resolve(self, err: Exception) -> ResolvedRule | None:
+        # the prelude of every variant: None means not translated
+        resolved = self.resolution.resolve(type(err))
+        if resolved is None:
+            self._unhandled(err)
+        return resolved
 
-    def _log_unmapped(self, err: Exception) -> None:
-        if self.warn_on_unmapped:
-            logger.warning(
-                "Unmapped %s on %s — add it to error_map or handle it globally",
+    def _unhandled(self, err: Exception) -> None:
+        # not translated: left to FastAPI, or unmapped and about to be re-raised
+        warnings = self.unmapped_warnings
+        if warnings is None and self.tracer is None:
+            return
+        if is_framework_exception(err):
+            if self.trace_passed_through is not None:
+                self._trace(
+                    self.trace_passed_through, err, self.passed_through_attributes
+                )
+            return
+        if warnings is not None:
+            warnings.warn(type(err))
+        if self.trace_unmapped is not None:
+            self._trace(self.trace_unmapped, err, self.unmapped_attributes)
+
+    def _translated(self, resolved: ResolvedRule, err: Exception) -> None:
+        # the guard skips building the log call's arguments in production
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Translated %s -> %d on %s",
                 type(err).__name__,
+                resolved.status,
+                self.route_label,
+            )
+        if self.trace_translated is not None:
+            self._trace(self.trace_translated, err, resolved.trace_attributes)
+
+    def _trace(
+        self,
+        event: Callable[[Exception, Mapping[str, Any]], None],
+        err: Exception,
+        attributes: Mapping[str, Any],
+    ) -> None:
+        self._observe("tracer", event, err, attributes)
+
+    def _observe(self, observer: str, call: Callable[..., None], *args: Any) -> None:
+        # tracer and profiler: user code watching the error path, never failing it
+        try:
+            call(*args)
+        except Exception:
+            logger.warning(
+                "%s failed on %s — response unaffected",
+                observer,
                 self.route_label,
+                exc_info=True,
             )
 
-    async def _translate(self, resolved: ResolvedRule, err: Exception) -> Response:
-        if resolved.on_error is not None:
+    def _render(self, resolved: ResolvedRule, err: Exception) -> Response:
+        self._translated(resolved, err)
+        builder = resolved.builder
+        if resolved.prebuilt is not None:
+            return builder.from_prebuilt(resolved.prebuilt)
+        body = builder.encode(resolved.translator(err))
+        return builder.build(body, builder.raw_headers(err))
+
+
+class _SideEffectPath(_ErrorPath):
+    # General variant: some rule has on_error, so the error path awaits.
+
+    async def respond(self, err: Exception, request: Request) -> Response | None:
+        resolved = self._resolve(err)
+        if resolved is None:
+            return None
+        dispatch = resolved.on_error_dispatch
+        if isinstance(dispatch, FanOut):
+            return await self._fan_out(dispatch, resolved, err, request)
+        pending = (
+            None
+            if dispatch is None
+            else self._hand_off(dispatch, resolved, err, request)
+        )
+        if pending is not None and pending.after_response:
+            response = self._render(resolved, err)
+            response.background = BackgroundTask(self._run_on_error, pending, err)
+            return response
+        if pending is not None:
+            await self._run_on_error(pending, err)
+        return self._render(resolved, err)
+
+    def _hand_off(
+        self,
+        dispatch: OnErrorDispatch,
+        resolved: ResolvedRule,
+        err: Exception,
+        request: Request,
+    ) -> OnErrorDispatch | None:
+        # sampled out, recorded or queued: nothing left for this request to run
+        if dispatch.sampler is not None and not dispatch.sampler.admit(request):
+            return None
+        if dispatch.recorder is not None:
             try:
-                await run_on_error(resolved.on_error, err)
-            except Exception:
+                dispatch.recorder.record(err, self.route_label, resolved.status)
+            except Exception:  # like any other sink: logged, response unaffected
                 logger.warning(
                     "on_error failed on %s — response unaffected",
                     self.route_label,
                     exc_info=True,
                 )
-        logger.debug(
-            "Translated %s -> %d on %s",
-            type(err).__name__,
-            resolved.status,
-            self.route_label,
+            return None
+        if dispatch.dispatcher is not None:
+            dispatch.dispatcher.submit(dispatch, err, resolved.status, self.route_label)
+            return None
+        return dispatch
+
+    async def _fan_out(
+        self,
+        fan_out: FanOut,
+        resolved: ResolvedRule,
+        err: Exception,
+        request: Request,
+    ) -> Response:
+        later = await self._before_response(fan_out.dispatches, resolved, err, request)
+        response = self._render(resolved, err)
+        if later:
+            response.background = BackgroundTask(self._run_all, later, err)
+        return response
+
+    async def _before_response(
+        self,
+        dispatches: Iterable[OnErrorDispatch],
+        resolved: ResolvedRule,
+        err: Exception,
+        request: Request,
+    ) -> list[OnErrorDispatch]:
+        # runs what must finish before the response; returns what runs after it.
+        # Wall time is the slowest sink, not the sum; failures stay per sink
+        inline: list[OnErrorDispatch] = []
+        later: list[OnErrorDispatch] = []
+        for dispatch in dispatches:
+            pending = self._hand_off(dispatch, resolved, err, request)
+            if pending is not None:
+                (later if pending.after_response else inline).append(pending)
+        if inline:
+            await self._run_all(inline, err)
+        return later
+
+    async def _run_all(self, dispatches: list[OnErrorDispatch], err: Exception) -> None:
+        async with anyio.create_task_group() as group:
+            for dispatch in dispatches:
+                group.start_soon(self._run_on_error, dispatch, err)
+
+    async def _run_on_error(self, dispatch: OnErrorDispatch, err: Exception) -> None:
+        try:
+            await run_on_error(dispatch, err)
+        except Exception:
+            logger.warning(
+                "on_error failed on %s — response unaffected",
+                self.route_label,
+                exc_info=True,
+            )
+
+
+class _ProfiledPath(_SideEffectPath):
+    # profiler= or server_timing= only: the same steps as the other variants,
+    # each timed. Every on_error shape goes through the fan-out lists;
+    # speed is not the point.
+
+    def __init__(
+        self,
+        *,
+        resolution: ResolutionCache,
+        warn_on_unmapped: bool,
+        route_label: RouteLabel,
+        profiler: ErrorPathProfiler | None,
+        server_timing: bool | Sampler,
+        tracer: Tracer | None = None,
+    ) -> None:
+        super().__init__(
+            resolution=resolution,
+            warn_on_unmapped=warn_on_unmapped,
+            route_label=route_label,
+            tracer=tracer,
         )
-        return JSONResponse(
-            status_code=resolved.status,
-            content=jsonable_encoder(resolved.translator(err)),
-            headers=resolved.headers_for(err) or None,
+        self.profiler = profiler
+        self.server_timing = server_timing is not False
+        self.server_timing_sampler = (
+            server_timing if isinstance(server_timing, Sampler) else None
+        )
+
+    async def respond(self, err: Exception, request: Request) -> Response | None:
+        raised = time.perf_counter()
+        timed = await self._timed(err, request)
+        if timed is None:
+            return None
+        response, timings = timed
+        sampler = self.server_timing_sampler
+        if self.server_timing and (sampler is None or sampler.admit(request)):
+            endpoint = raised - request.scope[_ENDPOINT_STARTED]
+            response.raw_headers.append(
+                (SERVER_TIMING, server_timing_header(endpoint, timings))
+            )
+        return response
+
+    async def _timed(
+        self, err: Exception, request: Request
+    ) -> tuple[Response, ErrorPathTimings] | None:
+        clock = time.perf_counter
+        started = clock()
+        resolved = self._resolve(err)
+        if resolved is None:
+            return None
+        resolved_at = clock()
+        later = await self._on_error(resolved, err, request)
+        on_error_done = clock()
+        self._translated(resolved, err)
+        builder = resolved.builder
+        if resolved.prebuilt is not None:
+            translated = encoded = headers_done = on_error_done
+            response = builder.from_prebuilt(resolved.prebuilt)
+        else:
+            content = resolved.translator(err)
+            translated = clock()
+            body = builder.encode(content)
+            encoded = clock()
+            raw_headers = builder.raw_headers(err)
+            headers_done = clock()
+            response = builder.build(body, raw_headers)
+        built = clock()
+        if later:
+            response.background = BackgroundTask(self._run_all, later, err)
+        timings = ErrorPathTimings(
+            route=self.route_label,
+            exc_type=type(err),
+            status=resolved.status,
+            resolve=resolved_at - started,
+            on_error=on_error_done - resolved_at,
+            translate=translated - on_error_done,
+            encode=encoded - translated,
+            headers=headers_done - encoded,
+            build=built - headers_done,
+        )
+        if self.profiler is not None:
+            self._observe("profiler", self.profiler.record, timings)
+        return response, timings
+
+    async def _on_error(
+        self, resolved: ResolvedRule, err: Exception, request: Request
+    ) -> list[OnErrorDispatch]:
+        # every on_error shape as a fan-out
+        dispatch = resolved.on_error_dispatch
+        if dispatch is None:
+            return []
+        fan_out = dispatch.dispatches if isinstance(dispatch, FanOut) else (dispatch,)
+        return await self._before_response(fan_out, resolved, err, request)
+
+
+class _ResolvedPath(_ErrorPath):
+    # No rule has on_error: the error path is sync, no coroutine per error.
+
+    def respond(self, err: Exception) -> Response | None:
+        resolved = self._resolve(err)
+        return None if resolved is None else self._render(resolved, err)
+
+
+class _SingleRulePath(_ResolvedPath):
+    # One entry, no on_error: isinstance replaces the MRO walk and its cache,
+    # so resolution_cache_info() stays at zero on these routes.
+
+    def __init__(
+        self,
+        *,
+        resolution: ResolutionCache,
+        warn_on_unmapped: bool,
+        route_label: RouteLabel,
+        tracer: Tracer | None = None,
+    ) -> None:
+        super().__init__(
+            resolution=resolution,
+            warn_on_unmapped=warn_on_unmapped,
+            route_label=route_label,
+            tracer=tracer,
         )
+        ((self.exc_type, self.resolved),) = resolution.compiled.items()
+
+    def _resolve(self, err: Exception) -> ResolvedRule | None:
+        # framework exceptions stay FastAPI's, whatever else they inherit
+        if isinstance(err, self.exc_type) and not is_framework_exception(err):
+            return self.resolved
+        self._unhandled(err)
+        return None
+
+
+# The handler is a closure, not an object with __call__: the success path adds
+# one plain coroutine frame — no bound-method creation, no attribute lookups.
+# respond() returning None means unmapped: bare raise keeps the traceback intact.
+# Translated, the exception may live on in a queue or a background on_error:
+# its frames' locals are released right away so they don't live on with it.
+
+
+def _with_sync_error_path(
+    original: RouteHandler,
+    respond: Callable[[Exception], Response | None],
+) -> RouteHandler:
+    async def handler(request: Request) -> Response:
+        try:
+            return await original(request)
+        except Exception as err:
+            response = respond(err)
+            if response is None:
+                raise
+            release_frames(err)
+            return response
+
+    return handler
+
+
+def _with_async_error_path(
+    original: RouteHandler,
+    respond: Callable[[Exception, Request], Awaitable[Response | None]],
+) -> RouteHandler:
+    async def handler(request: Request) -> Response:
+        try:
+            return await original(request)
+        except Exception as err:
+            response = await respond(err, request)
+            if response is None:
+                raise
+            release_frames(err)
+            return response
+
+    return handler
+
+
+def _with_measured_error_path(
+    original: RouteHandler,
+    respond: Callable[[Exception, Request], Awaitable[Response | None]],
+    metrics: RouteErrorMetrics,
+) -> RouteHandler:
+    # only with metrics=: the clock and counters stay off the other variants
+    async def handler(request: Request) -> Response:
+        try:
+            return await original(request)
+        except Exception as err:
+            started = time.perf_counter()
+            response = await respond(err, request)
+            if response is None:
+                if is_framework_exception(err):
+                    metrics.count_passed_through(type(err))
+                else:
+                    metrics.count_unmapped(type(err))
+                raise
+            release_frames(err)
+            metrics.count_translated(
+                type(err), response.status_code, time.perf_counter() - started
+            )
+            return response
+
+    return handler
+
+
+def _with_endpoint_clock(handler: RouteHandler) -> RouteHandler:
+    # server_timing= only: the one variant that reads the clock on success too,
+    # so the error path knows how long the endpoint ran before it raised
+    async def timed(request: Request) -> Response:
+        request.scope[_ENDPOINT_STARTED] = time.perf_counter()
+        return await handler(request)
+
+    return timed
+
+
+def _as_async(
+    respond: Callable[[Exception], Response | None],
+) -> Callable[[Exception, Request], Awaitable[Response | None]]:
+    async def respond_async(err: Exception, _request: Request) -> Response | None:
+        return respond(err)
+
+    return respond_async
 
 
 def wrap_route_handler(
     original: RouteHandler,
     *,
-    compiled: CompiledErrorMap,
+    resolution: ResolutionCache,
     warn_on_unmapped: bool,
     route_label: RouteLabel,
+    metrics: RouteErrorMetrics | None = None,
+    profiler: ErrorPathProfiler | None = None,
+    tracer: Tracer | None = None,
+    server_timing: bool | Sampler = False,
 ) -> RouteHandler:
-    return _ErrorHandlingHandler(
-        original,
-        compiled=compiled,
-        warn_on_unmapped=warn_on_unmapped,
-        route_label=route_label,
+    compiled = resolution.compiled
+    respond: Callable[[Exception, Request], Awaitable[Response | None]]
+    if profiler is not None or server_timing is not False:
+        timed_path = _ProfiledPath(
+            resolution=resolution,
+            warn_on_unmapped=warn_on_unmapped,
+            route_label=route_label,
+            profiler=profiler,
+            server_timing=server_timing,
+            tracer=tracer,
+        )
+        respond = timed_path.respond
+    elif any(resolved.on_error_dispatch is not None for resolved in compiled.values()):
+        respond = _SideEffectPath(
+            resolution=resolution,
+            warn_on_unmapped=warn_on_unmapped,
+            route_label=route_label,
+            tracer=tracer,
+        ).respond
+    else:
+        variant = _SingleRulePath if len(compiled) == 1 else _ResolvedPath
+        sync_path = variant(
+            resolution=resolution,
+            warn_on_unmapped=warn_on_unmapped,
+            route_label=route_label,
+            tracer=tracer,
+        )
+        if metrics is None:
+            return _with_sync_error_path(original, sync_path.respond)
+        respond = _as_async(sync_path.respond)
+    handler = (
+        _with_async_error_path(original, respond)
+        if metrics is None
+        else _with_measured_error_path(original, respond, metrics)
     )
+    return handler if server_timing is False else _with_endpoint_clock(handler)
@@ -0,0 +1,220 @@
+import contextlib
+import dataclasses
+import json
+import os
+import struct
+import threading
+import zlib
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import IO, Any, Final
+
+from fastapi_error_map.events import ErrorEvent
+from fastapi_error_map.sinks import DEFAULT_MAX_PENDING, BatchSink
+
+# Record: >II header (payload length, crc32 of payload), then the payload —
+# the event as compact JSON. A torn tail (crash mid-write) fails the length
+# or crc check and ends that segment for the reader.
+_HEADER: Final[struct.Struct] = struct.Struct(">II")
+_SEGMENT_GLOB: Final[str] = "segment-*.journal"
+
+# readers skip fields they don't know: newer journals stay readable
+_EVENT_FIELDS: Final[frozenset[str]] = frozenset(
+    field.name for field in dataclasses.fields(ErrorEvent)
+)
+
+DEFAULT_SEGMENT_BYTES: Final[int] = 64 * 1024 * 1024
+DEFAULT_MAX_BYTES: Final[int] = 1024 * 1024 * 1024
+
+
+def _segment_name(index: int, pid: int) -> str:
+    return f"segment-{index:08d}-{pid}.journal"
+
+
+def _segment_index(segment: Path) -> int:
+    return int(segment.stem.split("-")[1])
+
+
+def _segments(directory: Path) -> list[Path]:
+    # zero-padded index first: name order is write order, across processes too
+    return sorted(directory.glob(_SEGMENT_GLOB))
+
+
+def encode_record(event: ErrorEvent) -> bytes:
+    payload = json.dumps(
+        dataclasses.asdict(event), separators=(",", ":"), default=repr
+    ).encode()
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+class _SegmentWriter:
+    # Runs in BatchSink's flush threads. The lock keeps each batch whole and
+    # contiguous; concurrent flushes may still land in either order.
+    # Segment names carry the pid: processes sharing a directory never
+    # append to, rotate or delete each other's segments.
+
+    def __init__(self, directory: Path, segment_bytes: int, max_bytes: int) -> None:
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._file: IO[bytes] | None = None
+        self._path: Path | None = None
+        self._size = 0
+        # this writer's finished segments and their sizes, oldest first
+        self._closed: list[tuple[Path, int]] = []
+
+    def write(self, events: list[ErrorEvent]) -> None:
+        data = b"".join(encode_record(event) for event in events)
+        with self._lock:
+            file = self._current(len(data))
+            try:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())  # group commit: one fsync per batch
+            except BaseException:
+                # a torn record ends the segment for readers: later batches
+                # go to a new one instead of hiding behind it
+                self._close_file()
+                raise
+            self._size += len(data)
+            self._enforce_cap()
+
+    def _current(self, incoming: int) -> IO[bytes]:
+        if self._file is not None and (
+            self._size == 0 or self._size + incoming <= self.segment_bytes
+        ):
+            return self._file
+        self._close_file()
+        # never append to an existing segment: its tail may be torn
+        existing = _segments(self.directory)
+        index = _segment_index(existing[-1]) + 1 if existing else 1
+        pid = os.getpid()
+        while True:
+            path = self.directory / _segment_name(index, pid)
+            try:
+                self._file = path.open("xb")
+            except FileExistsError:
+                index += 1  # taken since the listing: try the next one
+                continue
+            break
+        self._path = path
+        self._size = 0
+        self._sync_directory()
+        return self._file
+
+    def _sync_directory(self) -> None:
+        # the new file's directory entry must survive a crash too (POSIX only)
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _enforce_cap(self) -> None:
+        # oldest first; the segment being written is never dropped
+        total = self._size + sum(size for _, size in self._closed)
+        while self._closed and total > self.max_bytes:
+            segment, size = self._closed.pop(0)
+            segment.unlink(missing_ok=True)
+            total -= size
+
+    def _close_file(self) -> None:
+        if self._file is None or self._path is None:
+            return
+        file, self._file = self._file, None
+        self._closed.append((self._path, self._size))
+        with contextlib.suppress(OSError):  # after a failed write, close may fail too
+            file.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_file()
+
+
+class Journal(BatchSink):
+    """Durable, append-only record of mapped errors in local segment files.
+
+    A ``BatchSink`` whose flush appends length-prefixed records and fsyncs
+    once per batch (group commit), so durability costs one fsync per
+    ``max_batch`` errors or ``max_delay_ms``, not one per error.
+    Segments rotate at ``segment_bytes``; past ``max_bytes`` the oldest are
+    deleted. Workers may share ``directory``: each writes, rotates and caps
+    only its own segments (the pid is in the name), so ``max_bytes`` is per
+    worker, and segments left by exited workers stay until you remove them.
+    Errors below ``min_status`` are skipped.
+    Read back with ``read_journal``, or ``python -m fastapi_error_map summarize``.
+
+    Example:
+        >>> journal = Journal("/var/lib/app/errors", min_status=500)
+        >>> router = ErrorAwareRouter(on_error=journal)
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        *,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        min_status: int = 0,
+        max_batch: int = 256,
+        max_delay_ms: float = 200.0,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        attributes: Iterable[str] = (),
+        traceback: bool | int = False,
+    ) -> None:
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        self.writer = _SegmentWriter(path, segment_bytes, max_bytes)
+        self.min_status = min_status
+        super().__init__(
+            self.writer.write,
+            max_batch=max_batch,
+            max_delay_ms=max_delay_ms,
+            max_pending=max_pending,
+            attributes=attributes,
+            traceback=traceback,
+        )
+
+    def record(self, err: Exception, route: str | None, status: int | None) -> None:
+        if status is not None and status < self.min_status:
+            return
+        super().record(err, route, status)
+
+    async def aclose(self) -> None:
+        await super().aclose()
+        self.writer.close()
+
+
+def _read_segment(segment: Path) -> Iterator[ErrorEvent]:
+    with segment.open("rb") as file:
+        while True:
+            header = file.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            length, crc = _HEADER.unpack(header)
+            payload = file.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return
+            fields: dict[str, Any] = json.loads(payload)
+            fields["args"] = tuple(fields["args"])
+            yield ErrorEvent(
+                **{
+                    name: value
+                    for name, value in fields.items()
+                    if name in _EVENT_FIELDS
+                }
+            )
+
+
+def read_journal(directory: str | os.PathLike[str]) -> Iterator[ErrorEvent]:
+    """Events of a ``Journal`` directory, oldest first; a torn tail is skipped.
+
+    Example:
+        >>> for event in read_journal("/var/lib/app/errors"):
+        ...     print(event.route, event.status, event.type_name)
+    """
+    for segment in _segments(Path(directory)):
+        yield from _read_segment(segment)
@@ -0,0 +1,35 @@
+import inspect
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Final
+
+# owner -> cleanup, for whatever on_error machinery started lazily
+# (batch sinks, process pools); owners register on start, leave on cleanup
+_active: Final[dict[Hashable, Callable[[], Awaitable[None] | None]]] = {}
+
+
+def track(owner: Hashable, cleanup: Callable[[], Awaitable[None] | None]) -> None:
+    _active[owner] = cleanup
+
+
+def untrack(owner: Hashable) -> None:
+    _active.pop(owner, None)
+
+
+async def shutdown() -> None:
+    """Flush and stop what ``on_error`` helpers started: batch sinks, process pools.
+
+    ``ErrorAwareRouter`` registers it as a shutdown handler; with a custom
+    ``lifespan``, await it on the way out. Safe to call more than once.
+
+    Example:
+        >>> @asynccontextmanager
+        ... async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        ...     yield
+        ...     await shutdown()
+    """
+    while _active:
+        # newest first, like an exit stack
+        _, cleanup = _active.popitem()
+        result = cleanup()
+        if inspect.isawaitable(result):
+            await result
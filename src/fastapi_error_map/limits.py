@@ -0,0 +1,113 @@
+from collections.abc import Awaitable, Callable
+from typing import Any, Literal, NamedTuple, get_args
+
+import anyio
+
+from fastapi_error_map.types_ import RouteConfigError
+
+LimitSaturation = Literal["skip", "queue"]
+
+
+class OnErrorLimitStats(NamedTuple):
+    """Counters of one ``OnErrorLimit``: current load and lifetime outcomes."""
+
+    running: int
+    waiting: int
+    completed: int
+    timed_out: int
+    skipped: int
+    queued: int
+
+
+class OnErrorLimit:
+    """Timeout and concurrency cap for an async ``on_error``; see ``limited``.
+
+    ``timeout`` (seconds) bounds the whole call, waiting for a slot included:
+    past it the callback is cancelled and the response goes out.
+    With ``max_concurrency`` calls running, ``saturation`` decides:
+    ``"skip"`` drops the call, ``"queue"`` waits for a slot (within ``timeout``).
+    One instance per rule — sharing it shares the cap.
+
+    Example:
+        >>> metrics_limit = OnErrorLimit(timeout=0.5, max_concurrency=20)
+        >>> rule(503, on_error=limited(push_metrics, metrics_limit))
+        >>> metrics_limit.stats().timed_out
+        0
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout: float | None = None,
+        max_concurrency: int | None = None,
+        saturation: LimitSaturation = "skip",
+    ) -> None:
+        if timeout is not None and timeout <= 0:
+            raise RouteConfigError(f"on_error timeout must be positive, got {timeout}")
+        if max_concurrency is not None and max_concurrency < 1:
+            raise RouteConfigError(
+                f"on_error max_concurrency must be at least 1, got {max_concurrency}"
+            )
+        if saturation not in get_args(LimitSaturation):
+            raise RouteConfigError(
+                f"on_error saturation must be one of {get_args(LimitSaturation)}"
+            )
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.saturation = saturation
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.timed_out = 0
+        self.skipped = 0
+        self.queued = 0
+        # created on first use: older AnyIO binds a semaphore to the running loop
+        self._slots: anyio.Semaphore | None = None
+
+    async def run(self, call: Callable[..., Awaitable[None]], *args: Any) -> None:
+        cap = self.max_concurrency
+        if cap is not None and self.running >= cap and self.saturation == "skip":
+            self.skipped += 1
+            return
+        with anyio.move_on_after(self.timeout) as scope:
+            if cap is None:
+                await self._call(call, *args)
+            else:
+                await self._call_in_slot(cap, call, *args)
+        if scope.cancelled_caught:
+            self.timed_out += 1
+
+    async def _call_in_slot(
+        self, cap: int, call: Callable[..., Awaitable[None]], *args: Any
+    ) -> None:
+        if self._slots is None:
+            self._slots = anyio.Semaphore(cap)
+        if self._slots.value == 0:
+            self.queued += 1
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            await self._call(call, *args)
+        finally:
+            self._slots.release()
+
+    async def _call(self, call: Callable[..., Awaitable[None]], *args: Any) -> None:
+        self.running += 1
+        try:
+            await call(*args)
+        finally:
+            self.running -= 1
+        self.completed += 1
+
+    def stats(self) -> OnErrorLimitStats:
+        return OnErrorLimitStats(
+            running=self.running,
+            waiting=self.waiting,
+            completed=self.completed,
+            timed_out=self.timed_out,
+            skipped=self.skipped,
+            queued=self.queued,
+        )
@@ -0,0 +1,296 @@
+import bisect
+import collections
+from collections.abc import Iterable
+from typing import Final, NamedTuple
+
+from fastapi_error_map.shared_metrics import SEP, SharedMetricsFile
+from fastapi_error_map.types_ import RouteConfigError, RouteLabel
+
+# upper bounds in seconds; the error path is usually well under a millisecond
+DEFAULT_BUCKETS: Final[tuple[float, ...]] = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+)
+
+_PREFIX: Final[str] = "fastapi_error_map"
+
+
+def _type_name(exc_type: type[BaseException]) -> str:
+    return f"{exc_type.__module__}.{exc_type.__qualname__}"
+
+
+class HistogramStats(NamedTuple):
+    """Cumulative counts per upper bound (``inf`` last), total and sum."""
+
+    buckets: tuple[tuple[float, int], ...]
+    total: int
+    sum: float
+
+
+class RouteErrorStats(NamedTuple):
+    """Counters of one route; exception types by qualified name."""
+
+    translated: dict[tuple[str, int], int]
+    unmapped: dict[str, int]
+    passed_through: dict[str, int]
+    duration: HistogramStats
+
+
+class RouteErrorMetrics:
+    # One per route label; the handler calls these with no lookup by label.
+    # Keyed by type object, not name: no string work until someone reads.
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.bounds = buckets
+        self.translated: collections.Counter[tuple[type[Exception], int]] = (
+            collections.Counter()
+        )
+        self.unmapped: collections.Counter[type[Exception]] = collections.Counter()
+        self.passed_through: collections.Counter[type[Exception]] = (
+            collections.Counter()
+        )
+        # one slot per bound plus the +Inf overflow; not cumulative until read
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.duration_sum = 0.0
+
+    def count_translated(
+        self, exc_type: type[Exception], status: int, seconds: float
+    ) -> None:
+        self.translated[exc_type, status] += 1
+        self.bucket_counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.duration_sum += seconds
+
+    def count_unmapped(self, exc_type: type[Exception]) -> None:
+        self.unmapped[exc_type] += 1
+
+    def count_passed_through(self, exc_type: type[Exception]) -> None:
+        self.passed_through[exc_type] += 1
+
+    def stats(self) -> RouteErrorStats:
+        return RouteErrorStats(
+            translated={
+                (_type_name(exc_type), status): count
+                for (exc_type, status), count in self.translated.items()
+            },
+            unmapped={_type_name(t): count for t, count in self.unmapped.items()},
+            passed_through={
+                _type_name(t): count for t, count in self.passed_through.items()
+            },
+            duration=_histogram(self.bounds, self.bucket_counts, self.duration_sum),
+        )
+
+
+class _SharedRouteErrorMetrics(RouteErrorMetrics):
+    # Same calls, counted into this worker's slot of a SharedMetricsFile.
+    # Series names are built once per (kind, type, status), then looked up.
+
+    def __init__(
+        self, label: RouteLabel, buckets: tuple[float, ...], shared: SharedMetricsFile
+    ) -> None:
+        super().__init__(buckets)
+        self.label = label
+        self.shared = shared
+        self._keys: dict[tuple[str, type[Exception], int], str] = {}
+        self._bucket_keys = [
+            SEP.join(("b", label, str(index))) for index in range(len(buckets) + 1)
+        ]
+        self._sum_key = SEP.join(("s", label))
+
+    def _key(self, kind: str, exc_type: type[Exception], status: int = 0) -> str:
+        key = self._keys.get((kind, exc_type, status))
+        if key is None:
+            key = SEP.join((kind, self.label, _type_name(exc_type), str(status)))
+            self._keys[kind, exc_type, status] = key
+        return key
+
+    def count_translated(
+        self, exc_type: type[Exception], status: int, seconds: float
+    ) -> None:
+        shared = self.shared
+        shared.add(self._key("t", exc_type, status), 1)
+        shared.add(self._bucket_keys[bisect.bisect_left(self.bounds, seconds)], 1)
+        shared.add(self._sum_key, seconds)
+
+    def count_unmapped(self, exc_type: type[Exception]) -> None:
+        self.shared.add(self._key("u", exc_type), 1)
+
+    def count_passed_through(self, exc_type: type[Exception]) -> None:
+        self.shared.add(self._key("p", exc_type), 1)
+
+
+def _histogram(
+    bounds: tuple[float, ...], counts: list[int], total_sum: float
+) -> HistogramStats:
+    cumulative: list[tuple[float, int]] = []
+    running = 0
+    for bound, count in zip((*bounds, float("inf")), counts, strict=True):
+        running += count
+        cumulative.append((bound, running))
+    return HistogramStats(buckets=tuple(cumulative), total=running, sum=total_sum)
+
+
+def _stats_from_totals(
+    totals: dict[str, float], bounds: tuple[float, ...]
+) -> dict[str, RouteErrorStats]:
+    translated: dict[str, dict[tuple[str, int], int]] = {}
+    unmapped: dict[str, dict[str, int]] = {}
+    passed: dict[str, dict[str, int]] = {}
+    buckets: dict[str, list[int]] = {}
+    sums: dict[str, float] = {}
+    for key, value in totals.items():
+        kind, route, *rest = key.split(SEP)
+        if kind == "t":
+            translated.setdefault(route, {})[rest[0], int(rest[1])] = int(value)
+        elif kind == "u":
+            unmapped.setdefault(route, {})[rest[0]] = int(value)
+        elif kind == "p":
+            passed.setdefault(route, {})[rest[0]] = int(value)
+        elif kind == "b" and int(rest[0]) <= len(bounds):
+            counts = buckets.setdefault(route, [0] * (len(bounds) + 1))
+            counts[int(rest[0])] = int(value)
+        elif kind == "s":
+            sums[route] = value
+    routes = {*translated, *unmapped, *passed, *buckets}
+    return {
+        route: RouteErrorStats(
+            translated=translated.get(route, {}),
+            unmapped=unmapped.get(route, {}),
+            passed_through=passed.get(route, {}),
+            duration=_histogram(
+                bounds,
+                buckets.get(route, [0] * (len(bounds) + 1)),
+                sums.get(route, 0.0),
+            ),
+        )
+        for route in sorted(routes)
+    }
+
+
+class ErrorMetrics:
+    """Per-route error counters kept by the handler; pass as ``metrics=``.
+
+    Counts translated errors by exception type and status, unmapped ones
+    by type, and framework exceptions passed through to FastAPI; times
+    the error path of translated ones in a fixed-bucket histogram.
+    Routes without ``error_map`` are not wrapped, so not counted.
+    Read with ``stats()``, or expose ``render_prometheus()``.
+    Counters are per process; with ``shared=``, a ``SharedMetricsFile``,
+    they are kept in it and ``stats()`` sums every worker of the app.
+
+    Example:
+        >>> metrics = ErrorMetrics()
+        >>> router = ErrorAwareRouter(metrics=metrics)
+        >>> @app.get("/metrics", response_class=PlainTextResponse)
+        ... def scrape() -> str:
+        ...     return metrics.render_prometheus()
+    """
+
+    def __init__(
+        self,
+        *,
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+        shared: SharedMetricsFile | None = None,
+    ) -> None:
+        bounds = tuple(buckets)
+        if not bounds or list(bounds) != sorted(set(bounds)):
+            raise RouteConfigError("metrics buckets must be increasing and non-empty")
+        self.buckets = bounds
+        self.shared = shared
+        self._routes: dict[RouteLabel, RouteErrorMetrics] = {}
+
+    def route(self, label: RouteLabel) -> RouteErrorMetrics:
+        # a route re-created by include_router keeps counting into the same slot
+        metrics = self._routes.get(label)
+        if metrics is None:
+            metrics = self._routes[label] = (
+                RouteErrorMetrics(self.buckets)
+                if self.shared is None
+                else _SharedRouteErrorMetrics(label, self.buckets, self.shared)
+            )
+        return metrics
+
+    def stats(self) -> dict[str, RouteErrorStats]:
+        if self.shared is not None:
+            return _stats_from_totals(self.shared.totals(), self.buckets)
+        return {label: metrics.stats() for label, metrics in self._routes.items()}
+
+    def render_prometheus(self) -> str:
+        """All counters in Prometheus text exposition format 0.0.4."""
+        return render_prometheus(self.stats())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def _counter(
+    name: str, help_text: str, samples: Iterable[tuple[str, int]]
+) -> list[str]:
+    return [
+        f"# HELP {name} {help_text}",
+        f"# TYPE {name} counter",
+        *(f"{name}{{{labels}}} {count}" for labels, count in samples),
+    ]
+
+
+def render_prometheus(stats: dict[str, RouteErrorStats]) -> str:
+    lines = _counter(
+        f"{_PREFIX}_translated_total",
+        "Exceptions translated to an error response.",
+        (
+            (_labels(route=route, exception=exception, status=str(status)), count)
+            for route, route_stats in stats.items()
+            for (exception, status), count in route_stats.translated.items()
+        ),
+    )
+    lines += _counter(
+        f"{_PREFIX}_unmapped_total",
+        "Exceptions not in error_map, re-raised.",
+        (
+            (_labels(route=route, exception=exception), count)
+            for route, route_stats in stats.items()
+            for exception, count in route_stats.unmapped.items()
+        ),
+    )
+    lines += _counter(
+        f"{_PREFIX}_passed_through_total",
+        "FastAPI exceptions left to FastAPI.",
+        (
+            (_labels(route=route, exception=exception), count)
+            for route, route_stats in stats.items()
+            for exception, count in route_stats.passed_through.items()
+        ),
+    )
+    duration = f"{_PREFIX}_error_path_seconds"
+    lines += [
+        f"# HELP {duration} Time from catching to responding, translated errors.",
+        f"# TYPE {duration} histogram",
+    ]
+    for route, route_stats in stats.items():
+        hist = route_stats.duration
+        for bound, count in hist.buckets:
+            labels = _labels(route=route, le=_bound(bound))
+            lines.append(f"{duration}_bucket{{{labels}}} {count}")
+        labels = _labels(route=route)
+        lines.append(f"{duration}_sum{{{labels}}} {hist.sum!r}")
+        lines.append(f"{duration}_count{{{labels}}} {hist.total}")
+    return "\n".join(lines) + "\n"
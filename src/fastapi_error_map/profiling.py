@@ -0,0 +1,151 @@
+from typing import Final, NamedTuple, Protocol, runtime_checkable
+
+SERVER_TIMING: Final[bytes] = b"server-timing"
+
+PHASES: Final[tuple[str, ...]] = (
+    "resolve",
+    "on_error",
+    "translate",
+    "encode",
+    "headers",
+    "build",
+)
+
+
+class ErrorPathTimings(NamedTuple):
+    """Seconds spent in each phase of one translated error, by ``perf_counter``.
+
+    ``on_error`` covers the hand-off and the callbacks awaited before the
+    response; ``after_response`` and queued ones run later and aren't in it.
+    A prebuilt (constant) response has no translate, encode or headers time.
+    """
+
+    route: str
+    exc_type: type[Exception]
+    status: int
+    resolve: float
+    on_error: float
+    translate: float
+    encode: float
+    headers: float
+    build: float
+
+    @property
+    def total(self) -> float:
+        return (
+            self.resolve
+            + self.on_error
+            + self.translate
+            + self.encode
+            + self.headers
+            + self.build
+        )
+
+
+@runtime_checkable
+class ErrorPathProfiler(Protocol):
+    """Gets the phase timings of every translated error; pass as ``profiler=``.
+
+    Called on the loop, once per error, before the response goes out:
+    keep it cheap. ``PhaseProfiler`` is a ready-made one.
+    """
+
+    def record(self, timings: ErrorPathTimings) -> None: ...
+
+
+class SlowestPhase(NamedTuple):
+    """One route's slowest phase, as in ``PhaseProfiler.report()``; seconds."""
+
+    route: str
+    phase: str
+    mean: float
+    max: float
+    share: float
+    errors: int
+
+
+class _PhaseTotals:
+    __slots__ = ("count", "max", "total")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class PhaseProfiler:
+    """``ErrorPathProfiler`` that sums phase timings per route.
+
+    ``report()`` is a table of routes by their slowest phase (highest total),
+    slowest first: mean and max of that phase, its share of the route's
+    error-path time, and the error count.
+
+    Example:
+        >>> profiler = PhaseProfiler()
+        >>> router = ErrorAwareRouter(profiler=profiler)
+        >>> print(profiler.report(top=5))
+        route              phase      mean ms  max ms  share  errors
+        ['GET'] /orders/   encode       0.412   1.904    71%     120
+    """
+
+    def __init__(self) -> None:
+        self._routes: dict[str, dict[str, _PhaseTotals]] = {}
+
+    def record(self, timings: ErrorPathTimings) -> None:
+        phases = self._routes.get(timings.route)
+        if phases is None:
+            phases = self._routes[timings.route] = {
+                phase: _PhaseTotals() for phase in PHASES
+            }
+        for phase, seconds in zip(PHASES, timings[3:], strict=True):
+            totals = phases[phase]
+            totals.count += 1
+            totals.total += seconds
+            totals.max = max(totals.max, seconds)
+
+    def slowest(self) -> list[SlowestPhase]:
+        """Each route's slowest phase, routes by that phase's total time."""
+        rows: list[SlowestPhase] = []
+        for route, phases in self._routes.items():
+            phase, totals = max(phases.items(), key=lambda item: item[1].total)
+            route_total = sum(t.total for t in phases.values())
+            rows.append(
+                SlowestPhase(
+                    route=route,
+                    phase=phase,
+                    mean=totals.total / totals.count,
+                    max=totals.max,
+                    share=totals.total / route_total if route_total else 0.0,
+                    errors=totals.count,
+                )
+            )
+        rows.sort(key=lambda row: row.mean * row.errors, reverse=True)
+        return rows
+
+    def report(self, top: int = 10) -> str:
+        rows = self.slowest()[:top]
+        width = max([len("route"), *(len(row.route) for row in rows)])
+        header = (
+            f"{'route':<{width}}  {'phase':<9}  {'mean ms':>8}  {'max ms':>8}"
+            f"  {'share':>5}  {'errors':>6}"
+        )
+        lines = [header]
+        lines += [
+            f"{route:<{width}}  {phase:<9}  {mean * 1000:>8.3f}  {peak * 1000:>8.3f}"
+            f"  {share:>5.0%}  {count:>6}"
+            for route, phase, mean, peak, share, count in rows
+        ]
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        self._routes.clear()
+
+
+def server_timing_header(endpoint: float, timings: ErrorPathTimings) -> bytes:
+    # Server-Timing metrics in milliseconds; serialize covers encode and build
+    return (
+        f"endpoint;dur={endpoint * 1000:.3f}, "
+        f"on_error;dur={timings.on_error * 1000:.3f}, "
+        f"translate;dur={timings.translate * 1000:.3f}, "
+        f"serialize;dur={(timings.encode + timings.build) * 1000:.3f}"
+    ).encode("latin-1")
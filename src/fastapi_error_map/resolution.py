@@ -0,0 +1,70 @@
+from collections import OrderedDict
+from typing import Final, NamedTuple
+
+from fastapi_error_map.framework import is_framework_exception_type
+from fastapi_error_map.rules import CompiledErrorMap, ResolvedRule
+
+DEFAULT_RESOLUTION_CACHE_SIZE: Final[int] = 128
+
+
+class ResolutionCacheInfo(NamedTuple):
+    """Counters of one route's resolution cache; shaped like ``cache_info()``."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class ResolutionCache:
+    # Memo of exc_type -> ResolvedRule | None: the MRO walk runs once per concrete type.
+    # None is cached too, so unmapped types skip the walk as well — and so are
+    # framework exceptions, whatever else they inherit: FastAPI renders those.
+    # LRU-bounded: types created at runtime can't grow it without limit.
+
+    def __init__(
+        self,
+        compiled: CompiledErrorMap,
+        maxsize: int = DEFAULT_RESOLUTION_CACHE_SIZE,
+    ) -> None:
+        self.compiled = compiled
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._memo: OrderedDict[type[Exception], ResolvedRule | None] = OrderedDict()
+
+    def resolve(self, exc_type: type[Exception]) -> ResolvedRule | None:
+        memo = self._memo
+        try:
+            resolved = memo[exc_type]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            memo.move_to_end(exc_type)
+            return resolved
+        self.misses += 1
+        resolved = self._walk_mro(exc_type)
+        if self.maxsize > 0:
+            memo[exc_type] = resolved
+            if len(memo) > self.maxsize:
+                memo.popitem(last=False)
+        return resolved
+
+    def _walk_mro(self, exc_type: type[Exception]) -> ResolvedRule | None:
+        if is_framework_exception_type(exc_type):
+            return None
+        ancestor: type[Exception]
+        for ancestor in exc_type.__mro__:
+            resolved = self.compiled.get(ancestor)
+            if resolved is not None:
+                return resolved
+        return None
+
+    def info(self) -> ResolutionCacheInfo:
+        return ResolutionCacheInfo(
+            hits=self.hits,
+            misses=self.misses,
+            maxsize=self.maxsize,
+            currsize=len(self._memo),
+        )
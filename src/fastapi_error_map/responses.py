@@ -0,0 +1,163 @@
+import functools
+from collections.abc import Callable, Mapping
+from typing import Any, Final, NamedTuple
+
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse, Response
+
+from fastapi_error_map.serialization import model_serializer
+from fastapi_error_map.types_ import Renderer, RouteConfigError, RouteLabel
+
+RawHeaders = tuple[tuple[bytes, bytes], ...]
+
+_JSON: Final[str] = "application/json"
+_CONTENT_TYPE: Final[bytes] = b"content-type"
+_CONTENT_LENGTH: Final[bytes] = b"content-length"
+# rendered once per renderer class at compile time: a broken one fails at startup
+_PROBE: Final[dict[str, str]] = {"error": "probe"}
+
+
+def inherited_renderer(response_class: Any) -> type[JSONResponse]:
+    # route's response_class, unless it can't render a JSON body (HTML, files, ...)
+    if isinstance(response_class, DefaultPlaceholder):
+        response_class = response_class.value
+    if isinstance(response_class, type) and issubclass(response_class, JSONResponse):
+        return response_class
+    return JSONResponse
+
+
+def encode_headers(headers: Mapping[str, str]) -> list[tuple[bytes, bytes]]:
+    return [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in headers.items()
+    ]
+
+
+def _content_type(response_class: type[Response]) -> bytes | None:
+    # same rule as Response.init_headers
+    media_type = response_class.media_type
+    if media_type is None:
+        return None
+    if media_type.startswith("text/") and "charset=" not in media_type.lower():
+        media_type += "; charset=" + response_class.charset
+    return media_type.encode("latin-1")
+
+
+class Prebuilt(NamedTuple):
+    """Response rendered once at compile time: bytes and ASGI headers, ready to send."""
+
+    body: bytes
+    raw_headers: RawHeaders
+
+
+class ResponseBuilder:
+    # Compiled per rule: everything that doesn't depend on the error is encoded
+    # once — serializer choice, content-type, static headers as latin-1 bytes.
+    # Responses are assembled from raw parts, skipping Response.__init__,
+    # so a renderer class contributes render(), media_type and its ASGI __call__.
+
+    def __init__(
+        self,
+        renderer: Renderer,
+        *,
+        status: int,
+        jsonable: bool,
+        static_headers: Mapping[str, str] | None,
+        dynamic_headers: Callable[[Exception], Mapping[str, str]] | None,
+        serialize_model: Any | None,
+        route_label: RouteLabel,
+    ) -> None:
+        self.status = status
+        self.jsonable = jsonable
+        self.dynamic_headers = dynamic_headers
+        if isinstance(renderer, type):
+            # the same rule as inherited_renderer: bodies are JSON
+            if not issubclass(renderer, JSONResponse):
+                raise RouteConfigError(
+                    f"{route_label}: renderer {renderer.__name__} is neither "
+                    f"a JSONResponse subclass nor a serializer"
+                )
+            self.response_class: type[Response] = renderer
+            # render() is content-only; an uninitialized instance is enough to call it
+            self.serialize: Callable[[Any], bytes | memoryview] = renderer.__new__(
+                renderer
+            ).render
+            try:
+                self.serialize(_PROBE)
+            except Exception as exc:
+                raise RouteConfigError(
+                    f"{route_label}: renderer {renderer.__name__} can't render "
+                    f"without __init__: {exc!r}"
+                ) from exc
+            self.content_type = _content_type(renderer)
+        else:
+            self.response_class = Response
+            self.serialize = renderer
+            self.content_type = _JSON.encode("latin-1")
+        self.encode: Callable[[Any], bytes] = self._encode
+        if serialize_model is not None:
+            self.encode = (
+                model_serializer(
+                    serialize_model,
+                    renderer,
+                    fallback=self._encode,
+                    route_label=route_label,
+                )
+                or self._encode
+            )
+        self.static_raw_headers: RawHeaders = tuple(
+            self._with_content_type(encode_headers(static_headers or {}))
+        )
+        # chosen once: static-only rules copy the list, no per-error branch
+        self.raw_headers: Callable[[Exception], list[tuple[bytes, bytes]]] = (
+            self._static
+            if dynamic_headers is None
+            else functools.partial(self._dynamic, dynamic_headers)
+        )
+
+    def _with_content_type(
+        self, raw_headers: list[tuple[bytes, bytes]]
+    ) -> list[tuple[bytes, bytes]]:
+        if self.content_type is not None and all(
+            name != _CONTENT_TYPE for name, _ in raw_headers
+        ):
+            raw_headers.append((_CONTENT_TYPE, self.content_type))
+        return raw_headers
+
+    def _encode(self, body: Any) -> bytes:
+        return bytes(self.serialize(jsonable_encoder(body) if self.jsonable else body))
+
+    def _static(self, err: Exception) -> list[tuple[bytes, bytes]]:  # noqa: ARG002
+        return list(self.static_raw_headers)
+
+    def _dynamic(
+        self,
+        headers_for: Callable[[Exception], Mapping[str, str]],
+        err: Exception,
+    ) -> list[tuple[bytes, bytes]]:
+        # only the callable's output is encoded per request
+        return self._with_content_type(encode_headers(headers_for(err)))
+
+    def build(self, body: bytes, raw_headers: list[tuple[bytes, bytes]]) -> Response:
+        if all(name != _CONTENT_LENGTH for name, _ in raw_headers):
+            raw_headers.append((_CONTENT_LENGTH, str(len(body)).encode("latin-1")))
+        response = self.response_class.__new__(self.response_class)
+        response.status_code = self.status
+        response.background = None
+        response.body = body
+        response.raw_headers = raw_headers
+        return response
+
+    def prebuild(self, body: Any) -> Prebuilt:
+        response = self.build(self.encode(body), list(self.static_raw_headers))
+        return Prebuilt(bytes(response.body), tuple(response.raw_headers))
+
+    def from_prebuilt(self, prebuilt: Prebuilt) -> Response:
+        # raw_headers is copied — middleware may append to it (cookies, CORS)
+        response = self.response_class.__new__(self.response_class)
+        response.status_code = self.status
+        response.background = None
+        response.body = prebuilt.body
+        response.raw_headers = list(prebuilt.raw_headers)
+        return response
@@ -1,10 +1,19 @@
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
 from typing import Any, Final, NoReturn
 
 from fastapi.types import DecoratedCallable
 
+from fastapi_error_map.metrics import ErrorMetrics
+from fastapi_error_map.profiling import ErrorPathProfiler
 from fastapi_error_map.rules import ErrorMap
-from fastapi_error_map.types_ import OnError, RouteConfigError, TranslatorFactory
+from fastapi_error_map.sampling import Sampler
+from fastapi_error_map.tracing import Tracer
+from fastapi_error_map.types_ import (
+    OnError,
+    Renderer,
+    RouteConfigError,
+    TranslatorFactory,
+)
 
 # RouteConfig channel: attached to the endpoint function (survives route re-creation).
 ATTR: Final[str] = "__fastapi_error_map__"
@@ -15,13 +24,28 @@ class RouteConfig:
         self,
         error_map: ErrorMap,
         translator_factory: TranslatorFactory | None = None,
-        on_error: OnError | None = None,
+        on_error: OnError | Sequence[OnError] | None = None,
         warn_on_unmapped: bool = True,
+        *,
+        renderer: Renderer | None = None,
+        jsonable: bool = True,
+        serialize_by_model: bool = False,
+        metrics: ErrorMetrics | None = None,
+        profiler: ErrorPathProfiler | None = None,
+        tracer: Tracer | None = None,
+        server_timing: bool | Sampler = False,
     ) -> None:
         self.error_map = error_map
         self.translator_factory = translator_factory
         self.on_error = on_error
         self.warn_on_unmapped = warn_on_unmapped
+        self.renderer = renderer
+        self.jsonable = jsonable
+        self.serialize_by_model = serialize_by_model
+        self.metrics = metrics
+        self.profiler = profiler
+        self.tracer = tracer
+        self.server_timing = server_timing
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, RouteConfig):
@@ -31,6 +55,13 @@ class RouteConfig:
             and self.translator_factory == other.translator_factory
             and self.on_error == other.on_error
             and self.warn_on_unmapped == other.warn_on_unmapped
+            and self.renderer == other.renderer
+            and self.jsonable == other.jsonable
+            and self.serialize_by_model == other.serialize_by_model
+            and self.metrics is other.metrics
+            and self.profiler is other.profiler
+            and self.tracer is other.tracer
+            and self.server_timing == other.server_timing
         )
 
     def __hash__(self) -> NoReturn:
@@ -48,21 +79,42 @@ def attach(func: Callable[..., Any], config: RouteConfig) -> None:
 
 def error_map(
     mapping: ErrorMap,
+    *,
+    renderer: Renderer | None = None,
+    jsonable: bool = True,
+    serialize_by_model: bool = False,
+    metrics: ErrorMetrics | None = None,
+    profiler: ErrorPathProfiler | None = None,
+    tracer: Tracer | None = None,
+    server_timing: bool | Sampler = False,
 ) -> Callable[[DecoratedCallable], DecoratedCallable]:
     """Carry ``error_map`` on endpoint — for routers other than ``ErrorAwareRouter``.
 
     Router must use ``route_class=ErrorAwareRoute``.
     With ``ErrorAwareRouter``, pass ``error_map=`` to route instead.
+    Keyword arguments are the route's policy, as on ``ErrorAwareRouter``.
 
     Example:
         >>> router = APIRouter(route_class=ErrorAwareRoute)
         >>> @router.get("/accounts/{account_id}/")
-        ... @error_map({ForbiddenError: 403})
+        ... @error_map({ForbiddenError: 403}, renderer=ORJSONResponse)
         ... def get_account(account_id: int) -> Account: ...
     """
 
     def decorator(func: DecoratedCallable) -> DecoratedCallable:
-        attach(func, RouteConfig(dict(mapping)))
+        attach(
+            func,
+            RouteConfig(
+                dict(mapping),
+                renderer=renderer,
+                jsonable=jsonable,
+                serialize_by_model=serialize_by_model,
+                metrics=metrics,
+                profiler=profiler,
+                tracer=tracer,
+                server_timing=server_timing,
+            ),
+        )
         return func
 
     return decorator
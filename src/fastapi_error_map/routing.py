@@ -1,21 +1,36 @@
 import inspect
-from collections.abc import Callable
-from typing import Any
+from collections.abc import Callable, Sequence
+from contextvars import ContextVar
+from typing import Any, ClassVar
 
+import fastapi.routing
 from fastapi.routing import APIRoute, APIRouter
 from fastapi.types import DecoratedCallable
 
 from fastapi_error_map.handler import wrap_route_handler
+from fastapi_error_map.lifespan import shutdown
+from fastapi_error_map.metrics import ErrorMetrics
 from fastapi_error_map.openapi import build_openapi_responses
+from fastapi_error_map.profiling import ErrorPathProfiler
+from fastapi_error_map.resolution import (
+    DEFAULT_RESOLUTION_CACHE_SIZE,
+    ResolutionCache,
+    ResolutionCacheInfo,
+)
+from fastapi_error_map.responses import inherited_renderer
 from fastapi_error_map.route_config import ATTR, RouteConfig, attach
 from fastapi_error_map.rules import (
+    CompiledErrorMap,
     ErrorMap,
     compile_error_map,
     warn_if_framework_exception_mapped,
     warn_if_validation_shadowed,
 )
+from fastapi_error_map.sampling import Sampler
+from fastapi_error_map.tracing import Tracer
 from fastapi_error_map.types_ import (
     OnError,
+    Renderer,
     RouteConfigError,
     RouteLabel,
     TranslatorFactory,
@@ -26,6 +41,22 @@ def _route_label(path: str, methods: Any = None) -> RouteLabel:
     return RouteLabel(f"{sorted(methods or [])} {path}")
 
 
+# Newer FastAPI shares one route across include_router calls and hands the
+# including router's settings to get_route_handler through this ContextVar;
+# older FastAPI re-creates the route with them, so the route already has them.
+_effective_route_context: ContextVar[Any] | None = getattr(
+    fastapi.routing, "_effective_route_context_var", None
+)
+
+
+def _effective_response_class(route: APIRoute) -> Any:
+    if _effective_route_context is not None:
+        context = _effective_route_context.get()
+        if context is not None and context.original_route is route:
+            return context.response_class
+    return route.response_class
+
+
 class ErrorAwareRoute(APIRoute):
     """``APIRoute`` that applies the ``error_map`` from ``@error_map`` on the endpoint.
 
@@ -36,44 +67,90 @@ class ErrorAwareRoute(APIRoute):
         >>> @router.get("/accounts/{account_id}/")
         ... @error_map({ForbiddenError: 403})
         ... def get_account(account_id: int) -> Account: ...
+
+    Resolved rules are memoized per exception type, up to
+    ``resolution_cache_size`` types (LRU); override it on a subclass.
     """
 
+    resolution_cache_size: ClassVar[int] = DEFAULT_RESOLUTION_CACHE_SIZE
+
     def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
         self._label = _route_label(path, kwargs.get("methods"))
         cfg: RouteConfig | None = getattr(endpoint, ATTR, None)
-        if cfg is not None and cfg.error_map:
-            self._compiled = compile_error_map(
-                cfg.error_map,
-                translator_factory=cfg.translator_factory,
-                default_on_error=cfg.on_error,
-                route_label=self._label,
+        self._config = cfg if cfg is not None and cfg.error_map else None
+        if self._config is not None:
+            self._renderer = self._config.renderer or inherited_renderer(
+                kwargs.get("response_class")
             )
+            self._compiled = self._compile(self._config, self._renderer)
             kwargs["responses"] = build_openapi_responses(
                 self._compiled, kwargs.get("responses")
             )
-            self._warn_on_unmapped = cfg.warn_on_unmapped
         else:
             self._compiled = {}
-            self._warn_on_unmapped = True
+        self._resolution = ResolutionCache(self._compiled, self.resolution_cache_size)
         super().__init__(path, endpoint, **kwargs)
 
+    def _compile(self, cfg: RouteConfig, renderer: Renderer) -> CompiledErrorMap:
+        return compile_error_map(
+            cfg.error_map,
+            translator_factory=cfg.translator_factory,
+            default_on_error=cfg.on_error,
+            default_renderer=renderer,
+            default_jsonable=cfg.jsonable,
+            default_serialize_by_model=cfg.serialize_by_model,
+            route_label=self._label,
+        )
+
+    def _resolution_for(self, cfg: RouteConfig) -> ResolutionCache:
+        # included routes may inherit another response class than seen at __init__
+        renderer = cfg.renderer or inherited_renderer(_effective_response_class(self))
+        if renderer is not self._renderer:
+            self._renderer = renderer
+            self._compiled = self._compile(cfg, renderer)
+            self._resolution = ResolutionCache(
+                self._compiled, self.resolution_cache_size
+            )
+        return self._resolution
+
+    def resolution_cache_info(self) -> ResolutionCacheInfo:
+        """Hits, misses and size of this route's exception-type resolution cache.
+
+        A map with a single entry and no ``on_error`` matches with ``isinstance``
+        and never consults the cache: its counters stay at zero.
+        """
+        return self._resolution.info()
+
     def get_route_handler(self) -> Callable[..., Any]:
         original = super().get_route_handler()
-        if not self._compiled:
+        if self._config is None:
             return original
         return wrap_route_handler(
             original,
-            compiled=self._compiled,
-            warn_on_unmapped=self._warn_on_unmapped,
+            resolution=self._resolution_for(self._config),
+            warn_on_unmapped=self._config.warn_on_unmapped,
             route_label=self._label,
+            metrics=(
+                None
+                if self._config.metrics is None
+                else self._config.metrics.route(self._label)
+            ),
+            profiler=self._config.profiler,
+            tracer=self._config.tracer,
+            server_timing=self._config.server_timing,
         )
 
 
 class ErrorAwareRouter(APIRouter):
     """Drop-in ``APIRouter`` with per-route error mapping.
 
-    Router-level ``translator_factory`` / ``on_error`` / ``warn_on_unmapped``
-    set policy for every route; ``error_map`` per route adds to it.
+    Router-level ``translator_factory`` / ``on_error`` / ``warn_on_unmapped`` /
+    ``renderer`` / ``jsonable`` / ``serialize_by_model`` / ``metrics`` /
+    ``profiler`` / ``tracer`` / ``server_timing`` set policy for every route;
+    ``error_map`` per route adds to it.
+    Without ``renderer``, errors use the route's response class when it
+    renders JSON (``default_response_class=ORJSONResponse`` carries over),
+    else ``JSONResponse``.
 
     Example:
         >>> router = ErrorAwareRouter()
@@ -86,8 +163,15 @@ class ErrorAwareRouter(APIRouter):
         *,
         error_map: ErrorMap | None = None,
         translator_factory: TranslatorFactory | None = None,
-        on_error: OnError | None = None,
+        on_error: OnError | Sequence[OnError] | None = None,
         warn_on_unmapped: bool = True,
+        renderer: Renderer | None = None,
+        jsonable: bool = True,
+        serialize_by_model: bool = False,
+        metrics: ErrorMetrics | None = None,
+        profiler: ErrorPathProfiler | None = None,
+        tracer: Tracer | None = None,
+        server_timing: bool | Sampler = False,
         **kwargs: Any,
     ) -> None:
         route_class = kwargs.setdefault("route_class", ErrorAwareRoute)
@@ -102,8 +186,17 @@ class ErrorAwareRouter(APIRouter):
             translator_factory,
             on_error,
             warn_on_unmapped,
+            renderer=renderer,
+            jsonable=jsonable,
+            serialize_by_model=serialize_by_model,
+            metrics=metrics,
+            profiler=profiler,
+            tracer=tracer,
+            server_timing=server_timing,
         )
         super().__init__(**kwargs)
+        # included routers hand shutdown handlers to the app
+        self.on_shutdown.append(shutdown)
 
     def api_route(
         self,
@@ -132,6 +225,13 @@ class ErrorAwareRouter(APIRouter):
                         self._route_config.translator_factory,
                         self._route_config.on_error,
                         self._route_config.warn_on_unmapped,
+                        renderer=self._route_config.renderer,
+                        jsonable=self._route_config.jsonable,
+                        serialize_by_model=self._route_config.serialize_by_model,
+                        metrics=self._route_config.metrics,
+                        profiler=self._route_config.profiler,
+                        tracer=self._route_config.tracer,
+                        server_timing=self._route_config.server_timing,
                     ),
                 )
             return parent(func)
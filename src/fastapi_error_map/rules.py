@@ -2,20 +2,25 @@ import functools
 import inspect
 import typing
 import warnings
-from collections.abc import Callable, Mapping
+from collections.abc import Callable, Mapping, Sequence
 from dataclasses import dataclass
 from typing import Any, Final, NamedTuple, TypeAlias, TypeVar
 
+from fastapi_error_map.concurrency import FanOut, OnErrorDispatch, compile_on_errors
 from fastapi_error_map.framework import (
     FRAMEWORK_EXCEPTIONS,
     is_framework_exception_type,
 )
 from fastapi_error_map.http_status import CLIENT_ERROR_FLOOR, ERROR_CEILING
+from fastapi_error_map.responses import Prebuilt, ResponseBuilder
+from fastapi_error_map.tracing import rule_attributes
 from fastapi_error_map.translator_factories import simple
 from fastapi_error_map.types_ import (
+    ConstantTranslator,
     ErrorMapWarning,
     Headers,
     OnError,
+    Renderer,
     RouteConfigError,
     RouteLabel,
     Translator,
@@ -35,7 +40,10 @@ class Rule:
     status: int
     translator: Translator[Any] | None = None
     headers: Headers | None = None
-    on_error: OnError | None = None
+    on_error: OnError | Sequence[OnError] | None = None
+    renderer: Renderer | None = None
+    jsonable: bool | None = None
+    serialize_by_model: bool | None = None
     openapi_model: type[Any] | None = None
     openapi_description: str | None = None
     openapi_examples: dict[str, Any] | None = None
@@ -49,7 +57,10 @@ def rule(
     *,
     translator: Translator[T] | None = None,
     headers: Headers | None = None,
-    on_error: OnError | None = None,
+    on_error: OnError | Sequence[OnError] | None = None,
+    renderer: Renderer | None = None,
+    jsonable: bool | None = None,
+    serialize_by_model: bool | None = None,
     openapi_model: type[T] | None = None,
     openapi_description: str | None = None,
     openapi_examples: dict[str, Any] | None = None,
@@ -58,6 +69,7 @@ def rule(
 
     Adds ``translator``, ``headers``, ``on_error``, or OpenAPI
     ``openapi_description`` / ``openapi_examples``.
+    ``on_error`` may be a list: every sink is called, async ones concurrently.
     Response model is read from translator's return annotation.
     Pass ``openapi_model`` when annotation is absent (lambda) or to override inference.
 
@@ -68,6 +80,16 @@ def rule(
     so put only safe-to-expose data in headers.
     Set a custom ``Content-Type`` here too, e.g. ``application/problem+json``.
 
+    ``renderer``: ``Response`` subclass (e.g. ``ORJSONResponse``) or serializer
+    ``(body) -> bytes``; defaults to the router's, else the route's JSON response class.
+    ``jsonable=False`` skips ``jsonable_encoder`` — for translators
+    that already return JSON-native data.
+    ``serialize_by_model=True`` dumps the body straight to JSON through
+    a pydantic ``TypeAdapter`` of the response model (pydantic v2) — only when
+    the model is a ``BaseModel``, the renderer plain JSON and the body an instance
+    of the model itself; anything else takes the generic path, so the bytes sent
+    are the same either way.
+
     Example:
         >>> error_map = {
         ...     UnauthorizedError: rule(
@@ -82,6 +104,9 @@ def rule(
         translator=translator,
         headers=headers,
         on_error=on_error,
+        renderer=renderer,
+        jsonable=jsonable,
+        serialize_by_model=serialize_by_model,
         openapi_model=openapi_model,
         openapi_description=openapi_description,
         openapi_examples=openapi_examples,
@@ -94,15 +119,14 @@ class ResolvedRule:
     translator: Translator[Any]
     static_headers: Mapping[str, str] | None
     dynamic_headers: Callable[[Exception], Mapping[str, str]] | None
-    on_error: OnError | None
+    on_error: OnError | Sequence[OnError] | None
+    on_error_dispatch: OnErrorDispatch | FanOut | None
+    builder: ResponseBuilder
     openapi_model: type[Any]
     openapi_description: str | None
     openapi_examples: dict[str, Any] | None
-
-    def headers_for(self, err: Exception) -> dict[str, str]:
-        if self.dynamic_headers is not None:
-            return dict(self.dynamic_headers(err))
-        return dict(self.static_headers or {})
+    prebuilt: Prebuilt | None
+    trace_attributes: Mapping[str, Any]
 
 
 CompiledErrorMap: TypeAlias = Mapping[type[Exception], ResolvedRule]
@@ -156,6 +180,12 @@ def _resolve_model(
     return inferred
 
 
+def _constant_body(translator: Translator[Any]) -> Any | None:
+    if isinstance(translator, ConstantTranslator):
+        return translator.constant_body()
+    return None
+
+
 class _SplitHeaders(NamedTuple):
     static: Mapping[str, str] | None
     dynamic: Callable[[Exception], Mapping[str, str]] | None
@@ -169,6 +199,18 @@ def _split_headers(headers: Headers | None) -> _SplitHeaders:
     return _SplitHeaders(static=None, dynamic=headers)
 
 
+def _prebuild(
+    translator: Translator[Any],
+    builder: ResponseBuilder,
+) -> Prebuilt | None:
+    if builder.dynamic_headers is not None:
+        return None
+    body = _constant_body(translator)
+    if body is None:
+        return None
+    return builder.prebuild(body)
+
+
 # warn helpers fire from the router decorator; 3 reaches the user's route line
 _DECORATOR_STACKLEVEL: Final[int] = 3
 _FRAMEWORK_NAMES: Final[str] = " / ".join(t.__name__ for t in FRAMEWORK_EXCEPTIONS)
@@ -205,7 +247,10 @@ def compile_error_map(
     error_map: ErrorMap,
     *,
     translator_factory: TranslatorFactory | None,
-    default_on_error: OnError | None,
+    default_on_error: OnError | Sequence[OnError] | None,
+    default_renderer: Renderer,
+    default_jsonable: bool,
+    default_serialize_by_model: bool,
     route_label: RouteLabel,
 ) -> dict[type[Exception], ResolvedRule]:
     compiled: dict[type[Exception], ResolvedRule] = {}
@@ -217,14 +262,34 @@ def compile_error_map(
             )
         translator = _resolve_translator(rule_, translator_factory)
         headers = _split_headers(rule_.headers)
+        on_error = rule_.on_error or default_on_error
+        model = _resolve_model(rule_, translator, route_label)
+        by_model = (
+            default_serialize_by_model
+            if rule_.serialize_by_model is None
+            else rule_.serialize_by_model
+        )
+        builder = ResponseBuilder(
+            rule_.renderer or default_renderer,
+            status=rule_.status,
+            jsonable=default_jsonable if rule_.jsonable is None else rule_.jsonable,
+            static_headers=headers.static,
+            dynamic_headers=headers.dynamic,
+            serialize_model=model if by_model else None,
+            route_label=route_label,
+        )
         compiled[exc_type] = ResolvedRule(
             status=rule_.status,
             translator=translator,
             static_headers=headers.static,
             dynamic_headers=headers.dynamic,
-            on_error=rule_.on_error or default_on_error,
-            openapi_model=_resolve_model(rule_, translator, route_label),
+            on_error=on_error,
+            on_error_dispatch=compile_on_errors(on_error) if on_error else None,
+            builder=builder,
+            openapi_model=model,
             openapi_description=rule_.openapi_description,
             openapi_examples=rule_.openapi_examples,
+            prebuilt=_prebuild(translator, builder),
+            trace_attributes=rule_attributes(route_label, exc_type, rule_.status),
         )
     return compiled
@@ -0,0 +1,142 @@
+import logging
+import random
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from typing import Final, NamedTuple
+
+from starlette.requests import Request
+
+from fastapi_error_map.types_ import RouteConfigError
+
+logger = logging.getLogger("fastapi_error_map")
+
+_HASH_SPACE: Final[int] = 2**32
+
+
+class SamplerStats(NamedTuple):
+    """Counters of one sampler: calls let through and calls skipped."""
+
+    admitted: int
+    skipped: int
+
+
+class Sampler(ABC):
+    # Base of the sampling policies: admit() decides per error, counters keep totals.
+    # One instance per policy use — sharing it across rules shares its window.
+    # decide() may run user code (by_key's key): if it raises, the call is
+    # skipped and the first failure logged, never failing the request.
+
+    def __init__(self) -> None:
+        self.admitted = 0
+        self.skipped = 0
+        self._failure_logged = False
+
+    @abstractmethod
+    def decide(self, request: Request) -> bool: ...
+
+    def admit(self, request: Request) -> bool:
+        try:
+            admitted = self.decide(request)
+        except Exception:
+            admitted = False
+            if not self._failure_logged:
+                self._failure_logged = True
+                logger.warning(
+                    "%s failed — skipping its calls, response unaffected",
+                    type(self).__name__,
+                    exc_info=True,
+                )
+        if admitted:
+            self.admitted += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def stats(self) -> SamplerStats:
+        return SamplerStats(admitted=self.admitted, skipped=self.skipped)
+
+
+def _check_rate(rate: float) -> None:
+    if not 0.0 <= rate <= 1.0:
+        raise RouteConfigError(f"sampling rate must be within [0, 1], got {rate}")
+
+
+class _FixedRate(Sampler):
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        _check_rate(rate)
+        self.rate = rate
+
+    def decide(self, request: Request) -> bool:  # noqa: ARG002
+        return random.random() < self.rate  # noqa: S311 — sampling, not security
+
+
+class _FirstThenEvery(Sampler):
+    def __init__(self, first: int, every: int) -> None:
+        super().__init__()
+        if first < 0 or every < 1:
+            raise RouteConfigError(
+                "first_then_every needs first >= 0 and every >= 1, "
+                f"got first={first}, every={every}"
+            )
+        self.first = first
+        self.every = every
+        self._second = 0
+        self._seen = 0
+
+    def decide(self, request: Request) -> bool:  # noqa: ARG002
+        second = int(time.monotonic())
+        if second != self._second:
+            self._second = second
+            self._seen = 0
+        self._seen += 1
+        past_first = self._seen - self.first
+        return past_first <= 0 or past_first % self.every == 0
+
+
+class _ByKey(Sampler):
+    def __init__(self, key: Callable[[Request], str | None], rate: float) -> None:
+        super().__init__()
+        _check_rate(rate)
+        self.key = key
+        self.threshold = int(rate * _HASH_SPACE)
+
+    def decide(self, request: Request) -> bool:
+        key = self.key(request)
+        if key is None:
+            return random.random() * _HASH_SPACE < self.threshold  # noqa: S311
+        return zlib.crc32(key.encode()) < self.threshold
+
+
+def fixed_rate(rate: float) -> Sampler:
+    """Let through a random ``rate`` share of errors (``0.01`` is 1%).
+
+    Example:
+        >>> rule(503, on_error=sampled(page_oncall, fixed_rate(0.01)))
+    """
+    return _FixedRate(rate)
+
+
+def first_then_every(first: int, every: int) -> Sampler:
+    """Let through the first ``first`` errors of each second, then 1 in ``every``.
+
+    Example:
+        >>> rule(503, on_error=sampled(page_oncall, first_then_every(10, 100)))
+    """
+    return _FirstThenEvery(first, every)
+
+
+def by_key(key: Callable[[Request], str | None], rate: float) -> Sampler:
+    """Let through a ``rate`` share, decided by a hash of a request key.
+
+    The same key gets the same decision in every worker and process — sample
+    by trace id, and a trace keeps all its events or none. No key: random.
+    A ``key`` that raises skips the call; the first failure is logged.
+
+    Example:
+        >>> trace_id = lambda request: request.headers.get("x-trace-id")
+        >>> rule(503, on_error=sampled(page_oncall, by_key(trace_id, 0.05)))
+    """
+    return _ByKey(key, rate)
@@ -0,0 +1,78 @@
+import functools
+from collections.abc import Callable
+from typing import Any, Final
+
+import pydantic
+from fastapi.responses import JSONResponse, ORJSONResponse, UJSONResponse
+
+from fastapi_error_map.types_ import Renderer, RouteConfigError, RouteLabel
+
+# TypeAdapter is pydantic v2; supported FastAPI also runs on v1, without this mode.
+_PYDANTIC_V2: Final[bool] = int(pydantic.VERSION.split(".", 1)[0]) >= 2  # noqa: PLR2004
+
+# renderers that send the encoded body as plain JSON: dump_json sends the same
+_PLAIN_JSON_RENDERS: Final[tuple[Callable[..., Any], ...]] = (
+    JSONResponse.render,
+    ORJSONResponse.render,
+    UJSONResponse.render,
+)
+
+
+@functools.cache
+def _adapter(model: Any) -> Any:
+    # one adapter per model, shared by every route and rule that declares it
+    from pydantic import TypeAdapter  # noqa: PLC0415 — v2 only
+
+    return TypeAdapter(model)
+
+
+class ModelSerializer:
+    # Body -> JSON bytes through the model's pydantic core serializer,
+    # skipping the jsonable_encoder walk. Only for instances of the model
+    # itself: jsonable_encoder dumps those the same way (by alias, JSON mode),
+    # so the wire output doesn't change. Dicts, subclass instances and bodies
+    # the serializer warns about take the generic path.
+
+    def __init__(
+        self,
+        model: Any,
+        fallback: Callable[[Any], bytes],
+        mismatch: type[Exception],
+    ) -> None:
+        self.model = model
+        self.dump_json: Callable[..., bytes] = _adapter(model).dump_json
+        self.fallback = fallback
+        self.mismatch = mismatch
+
+    def __call__(self, body: Any) -> bytes:
+        if type(body) is not self.model:
+            return self.fallback(body)
+        try:
+            return self.dump_json(body, by_alias=True, warnings="error")
+        except self.mismatch:
+            return self.fallback(body)
+
+
+def model_serializer(
+    model: Any,
+    renderer: Renderer,
+    *,
+    fallback: Callable[[Any], bytes],
+    route_label: RouteLabel,
+) -> ModelSerializer | None:
+    if not _PYDANTIC_V2:
+        raise RouteConfigError(
+            f"{route_label}: serialize_by_model needs pydantic v2 (TypeAdapter)"
+        )
+    from pydantic_core import PydanticSerializationError  # noqa: PLC0415 — v2 only
+
+    # other models have no instances (TypedDict, unions) or are dumped
+    # differently by jsonable_encoder (dataclasses: Decimal); custom renderers
+    # may reshape the body: all of those keep the generic path
+    if not (
+        isinstance(model, type)
+        and issubclass(model, pydantic.BaseModel)
+        and getattr(renderer, "render", None) in _PLAIN_JSON_RENDERS
+    ):
+        return None
+    return ModelSerializer(model, fallback, PydanticSerializationError)
@@ -0,0 +1,269 @@
+import functools
+import logging
+import mmap
+import os
+import struct
+import sys
+import weakref
+from pathlib import Path
+from typing import Any, Final
+
+if sys.platform != "win32":
+    import fcntl
+
+from fastapi_error_map.types_ import RouteConfigError
+
+logger = logging.getLogger("fastapi_error_map")
+
+# File: header, then one fixed-size slot per worker. Slot: entry count, then
+# entries of (key, value). A worker only ever writes its own slot, so no
+# locking; a slot is owned while its header range is fcntl-locked, and the
+# OS drops that lock when the worker dies — the next worker adopts the slot,
+# counts included, so aggregate counters never go backwards.
+# fcntl locks belong to the process, and closing any fd of the file drops them
+# all: instances on one file in one process share a single _OpenFile.
+_MAGIC: Final[bytes] = b"FEMM"
+_VERSION: Final[int] = 1
+_FILE_HEADER: Final[struct.Struct] = struct.Struct(
+    "<4sIII"
+)  # magic, version, slots, series
+_SLOT_HEADER: Final[struct.Struct] = struct.Struct("<I12x")  # entries in use
+_VALUE: Final[struct.Struct] = struct.Struct("<d")
+_KEY_BYTES: Final[int] = 504
+_ENTRY_BYTES: Final[int] = _KEY_BYTES + _VALUE.size
+
+# key fields are joined by the ASCII unit separator
+SEP: Final[str] = "\x1f"
+
+DEFAULT_MAX_WORKERS: Final[int] = 64
+DEFAULT_MAX_SERIES: Final[int] = 1024
+
+
+class _OpenFile:
+    # one per file per process: the fd, its map and the slots claimed through it
+    def __init__(self, key: tuple[int, int], fd: int, mapped: mmap.mmap) -> None:
+        self.key = key
+        self.fd = fd
+        self.map = mapped
+        self.claimed: set[int] = set()
+        self.users = 0
+
+
+# (st_dev, st_ino) -> the process's open handle on that file
+_open_files: Final[dict[tuple[int, int], _OpenFile]] = {}
+
+
+class SharedMetricsFile:
+    """Memory-mapped file that ``ErrorMetrics`` workers count into together.
+
+    Give every worker of one app the same ``path`` (``/dev/shm`` keeps it
+    in memory); ``ErrorMetrics(shared=...)`` then aggregates across them.
+    Each worker writes only its own slot, claimed on its first error, so
+    counting takes no lock. A dead worker's slot, with its counts, passes
+    to the next worker that starts. ``max_workers`` slots of ``max_series``
+    counters each; series past that are dropped with a warning.
+    Counts survive restarts: remove the file on deploy to start from zero.
+    Instances on the same path in one process share the open file and take
+    a slot each. POSIX only.
+
+    Example:
+        >>> shared = SharedMetricsFile("/dev/shm/orders-api.errors", max_workers=32)
+        >>> metrics = ErrorMetrics(shared=shared)
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_series: int = DEFAULT_MAX_SERIES,
+    ) -> None:
+        if sys.platform == "win32":
+            raise RouteConfigError("SharedMetricsFile needs POSIX file locks")
+        if max_workers < 1 or max_series < 1:
+            raise RouteConfigError(
+                "SharedMetricsFile needs at least 1 worker slot and 1 series"
+            )
+        self.path = os.fspath(path)
+        self.max_workers = max_workers
+        self.max_series = max_series
+        self.slot_bytes = _SLOT_HEADER.size + max_series * _ENTRY_BYTES
+        self._file = self._open()
+        self._map = self._file.map
+        self._slot: int | None = None
+        self._offsets: dict[str, int] = {}
+        self._full = False
+        # a forked child holds none of the parent's locks: it claims its own slot
+        os.register_at_fork(
+            after_in_child=functools.partial(
+                _call_if_alive, weakref.WeakMethod(self._forget_slot)
+            )
+        )
+
+    def _open(self) -> _OpenFile:
+        try:
+            stat = Path(self.path).stat()
+        except FileNotFoundError:
+            opened = None
+        else:
+            opened = _open_files.get((stat.st_dev, stat.st_ino))
+        if opened is not None:
+            # a second fd would drop the other instance's slot lock when closed
+            self._check_layout(opened.fd)
+            opened.users += 1
+            return opened
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self._check_layout(fd)
+            stat = os.fstat(fd)
+            size = _FILE_HEADER.size + self.max_workers * self.slot_bytes
+            key = (stat.st_dev, stat.st_ino)
+            opened = _open_files[key] = _OpenFile(key, fd, mmap.mmap(fd, size))
+        except BaseException:
+            os.close(fd)
+            raise
+        opened.users += 1
+        return opened
+
+    def _check_layout(self, fd: int) -> None:
+        header = _FILE_HEADER.pack(_MAGIC, _VERSION, self.max_workers, self.max_series)
+        # header lock only while creating: workers may start together
+        fcntl.lockf(fd, fcntl.LOCK_EX, _FILE_HEADER.size, 0)
+        try:
+            if os.fstat(fd).st_size == 0:
+                os.ftruncate(fd, _FILE_HEADER.size + self.max_workers * self.slot_bytes)
+                os.pwrite(fd, header, 0)
+            elif os.pread(fd, _FILE_HEADER.size, 0) != header:
+                raise RouteConfigError(
+                    f"{self.path} holds metrics of another layout — "
+                    f"remove it or pass the same max_workers / max_series"
+                )
+        finally:
+            fcntl.lockf(fd, fcntl.LOCK_UN, _FILE_HEADER.size, 0)
+
+    def _slot_start(self, slot: int) -> int:
+        return _FILE_HEADER.size + slot * self.slot_bytes
+
+    def _claim(self) -> int | None:
+        for slot in range(self.max_workers):
+            # the process's own lock wouldn't stop it: skip slots claimed here
+            if slot in self._file.claimed:
+                continue
+            try:
+                # held for the worker's life; never closing the fd keeps it
+                fcntl.lockf(
+                    self._file.fd,
+                    fcntl.LOCK_EX | fcntl.LOCK_NB,
+                    _SLOT_HEADER.size,
+                    self._slot_start(slot),
+                )
+            except OSError:
+                continue
+            self._file.claimed.add(slot)
+            self._adopt(slot)
+            return slot
+        return None
+
+    def _adopt(self, slot: int) -> None:
+        # entries left by a dead owner keep their place and their counts
+        start = self._slot_start(slot)
+        (entries,) = _SLOT_HEADER.unpack_from(self._map, start)
+        self._slot = slot
+        self._offsets = {
+            key: offset + _KEY_BYTES for key, offset in self._entries(start, entries)
+        }
+
+    def _forget_slot(self) -> None:
+        if self._slot is not None:
+            self._file.claimed.discard(self._slot)
+        self._slot = None
+        self._offsets = {}
+        self._full = False
+
+    def _entries(self, start: int, entries: int) -> list[tuple[str, int]]:
+        first = start + _SLOT_HEADER.size
+        return [
+            (
+                bytes(self._map[offset : offset + _KEY_BYTES]).rstrip(b"\0").decode(),
+                offset,
+            )
+            for offset in range(first, first + entries * _ENTRY_BYTES, _ENTRY_BYTES)
+        ]
+
+    def add(self, key: str, amount: float) -> None:
+        """Add to this worker's counter ``key``; only this process writes it."""
+        offset = self._offsets.get(key)
+        if offset is None:
+            offset = self._allocate(key)
+            if offset is None:
+                return
+        (value,) = _VALUE.unpack_from(self._map, offset)
+        _VALUE.pack_into(self._map, offset, value + amount)
+
+    def _allocate(self, key: str) -> int | None:
+        if self._slot is None:
+            if self._full:  # no slot was free: don't rescan on every error
+                return None
+            self._slot = self._claim()
+            if self._slot is None:
+                self._warn_full(f"all {self.max_workers} worker slots are taken")
+                return None
+            offset = self._offsets.get(key)
+            if offset is not None:
+                return offset
+        encoded = key.encode()
+        start = self._slot_start(self._slot)
+        entries: int = _SLOT_HEADER.unpack_from(self._map, start)[0]
+        if entries >= self.max_series or len(encoded) > _KEY_BYTES:
+            self._warn_full(f"series {key!r} does not fit")
+            return None
+        entry = start + _SLOT_HEADER.size + entries * _ENTRY_BYTES
+        self._map[entry : entry + _KEY_BYTES] = encoded.ljust(_KEY_BYTES, b"\0")
+        _VALUE.pack_into(self._map, entry + _KEY_BYTES, 0.0)
+        # published last: a reader never sees a half-written entry
+        _SLOT_HEADER.pack_into(self._map, start, entries + 1)
+        self._offsets[key] = entry + _KEY_BYTES
+        return entry + _KEY_BYTES
+
+    def _warn_full(self, reason: str) -> None:
+        if not self._full:
+            self._full = True
+            logger.warning(
+                "SharedMetricsFile %s: %s — errors go uncounted in this worker",
+                self.path,
+                reason,
+            )
+
+    def close(self) -> None:
+        """Release this instance's slot; the file closes with its last instance."""
+        if self._slot is not None:
+            fcntl.lockf(
+                self._file.fd,
+                fcntl.LOCK_UN,
+                _SLOT_HEADER.size,
+                self._slot_start(self._slot),
+            )
+        self._forget_slot()
+        opened = self._file
+        opened.users -= 1
+        if opened.users == 0:
+            del _open_files[opened.key]
+            opened.map.close()
+            os.close(opened.fd)
+
+    def totals(self) -> dict[str, float]:
+        """Every counter summed over all slots — live workers and dead ones."""
+        totals: dict[str, float] = {}
+        for slot in range(self.max_workers):
+            start = self._slot_start(slot)
+            (entries,) = _SLOT_HEADER.unpack_from(self._map, start)
+            for key, offset in self._entries(start, entries):
+                (value,) = _VALUE.unpack_from(self._map, offset + _KEY_BYTES)
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+
+def _call_if_alive(method: "weakref.WeakMethod[Any]") -> None:
+    bound = method()
+    if bound is not None:
+        bound()
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Final, NamedTuple
+
+import anyio.to_thread
+
+from fastapi_error_map import lifespan
+from fastapi_error_map.concurrency import is_async_callable
+from fastapi_error_map.events import ErrorEvent, EventRecorder
+
+logger = logging.getLogger("fastapi_error_map")
+
+DEFAULT_BATCH_SIZE: Final[int] = 100
+DEFAULT_BATCH_DELAY_MS: Final[float] = 1000.0
+DEFAULT_MAX_PENDING: Final[int] = 10_000
+
+BatchCallback = Callable[[list[ErrorEvent]], Awaitable[None] | None]
+
+
+class BatchSinkStats(NamedTuple):
+    """Counters of one ``BatchSink``: events waiting now and lifetime outcomes."""
+
+    buffered: int
+    in_flight: int
+    flushed: int
+    dropped: int
+
+
+class BatchSink(EventRecorder):
+    """``on_error`` that collects ``ErrorEvent`` snapshots and flushes them in batches.
+
+    One call of ``flush`` per ``max_batch`` events, or per ``max_delay_ms``
+    after the first event of a batch, whichever comes first; the rest is flushed
+    on app shutdown. Sync ``flush`` runs in a thread, async on the loop.
+    At most ``max_pending`` events wait (buffered or being flushed);
+    past that, new events are dropped and counted.
+    ``traceback`` is as for ``ErrorEvent.capture``: ``5`` keeps the innermost 5 frames.
+
+    Example:
+        >>> audit = BatchSink(write_audit_rows, max_batch=500, max_delay_ms=250)
+        >>> router = ErrorAwareRouter(on_error=audit)
+    """
+
+    def __init__(
+        self,
+        flush: BatchCallback,
+        *,
+        max_batch: int = DEFAULT_BATCH_SIZE,
+        max_delay_ms: float = DEFAULT_BATCH_DELAY_MS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        attributes: Iterable[str] = (),
+        traceback: bool | int = False,
+    ) -> None:
+        self.flush = flush
+        self._flush_is_async = is_async_callable(flush)
+        self.max_batch = max_batch
+        self.delay = max_delay_ms / 1000
+        self.max_pending = max_pending
+        self.attributes = tuple(attributes)
+        self.traceback = traceback
+        self.flushed = 0
+        self.dropped = 0
+        self._buffer: list[ErrorEvent] = []
+        self._in_flight = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def __call__(self, err: Exception) -> None:
+        # outside an error_map route; async only to be sure of a running loop
+        self.record(err, None, None)
+
+    def record(self, err: Exception, route: str | None, status: int | None) -> None:
+        if len(self._buffer) + self._in_flight >= self.max_pending:
+            self.dropped += 1
+            return
+        self._buffer.append(
+            ErrorEvent.capture(
+                err,
+                attributes=self.attributes,
+                traceback=self.traceback,
+                route=route,
+                status=status,
+            )
+        )
+        if len(self._buffer) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.delay, self._start_flush)
+            lifespan.track(self, self.aclose)
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._buffer = self._buffer, []
+        if not batch:
+            return
+        self._in_flight += len(batch)
+        task = asyncio.get_running_loop().create_task(self._deliver(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        lifespan.track(self, self.aclose)
+
+    async def _deliver(self, batch: list[ErrorEvent]) -> None:
+        try:
+            if self._flush_is_async:
+                await self.flush(batch)  # type: ignore[misc]
+            else:
+                await anyio.to_thread.run_sync(self.flush, batch)
+        except Exception:
+            logger.warning(
+                "BatchSink flush failed — %d events lost", len(batch), exc_info=True
+            )
+        else:
+            self.flushed += len(batch)
+        finally:
+            self._in_flight -= len(batch)
+
+    async def aclose(self) -> None:
+        """Flush what is buffered and wait for flushes in progress."""
+        self._start_flush()
+        lifespan.untrack(self)
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    def stats(self) -> BatchSinkStats:
+        return BatchSinkStats(
+            buffered=len(self._buffer),
+            in_flight=self._in_flight,
+            flushed=self.flushed,
+            dropped=self.dropped,
+        )
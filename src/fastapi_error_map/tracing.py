@@ -0,0 +1,57 @@
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, Final, Protocol, runtime_checkable
+
+from fastapi_error_map.types_ import RouteLabel
+
+ROUTE: Final[str] = "error_map.route"
+OUTCOME: Final[str] = "error_map.outcome"
+RULE: Final[str] = "error_map.rule"
+STATUS: Final[str] = "http.response.status_code"
+
+
+@runtime_checkable
+class Tracer(Protocol):
+    """What the handler reports to a tracer; pass as ``tracer=``.
+
+    One call per exception the error path sees, on the loop, before the
+    response: ``translated`` for a mapped one, ``unmapped`` when it is
+    re-raised, ``passed_through`` for ``HTTPException`` and validation
+    errors left to FastAPI. ``attributes`` are built once per rule or route
+    and shared between calls — read-only; the exception type is ``type(err)``.
+    Attribute keys: ``error_map.route``, ``error_map.outcome``, and for
+    translated errors ``error_map.rule`` (the mapped type) and
+    ``http.response.status_code``.
+
+    Example:
+        >>> class OtelTracer:
+        ...     def translated(self, err, attributes):
+        ...         trace.get_current_span().add_event("error_map", attributes)
+        ...     unmapped = passed_through = translated
+        >>> router = ErrorAwareRouter(tracer=OtelTracer())
+    """
+
+    def translated(self, err: Exception, attributes: Mapping[str, Any], /) -> None: ...
+
+    def unmapped(self, err: Exception, attributes: Mapping[str, Any], /) -> None: ...
+
+    def passed_through(
+        self, err: Exception, attributes: Mapping[str, Any], /
+    ) -> None: ...
+
+
+def rule_attributes(
+    route_label: RouteLabel, exc_type: type[Exception], status: int
+) -> Mapping[str, Any]:
+    return MappingProxyType(
+        {
+            ROUTE: route_label,
+            OUTCOME: "translated",
+            RULE: f"{exc_type.__module__}.{exc_type.__qualname__}",
+            STATUS: status,
+        }
+    )
+
+
+def route_attributes(route_label: RouteLabel, outcome: str) -> Mapping[str, Any]:
+    return MappingProxyType({ROUTE: route_label, OUTCOME: outcome})
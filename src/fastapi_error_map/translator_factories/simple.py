@@ -26,6 +26,11 @@ class _SimpleFor:
             return SimpleErrorResponse(error=DEFAULT_SERVER_MESSAGE)
         return SimpleErrorResponse(error=str(err))
 
+    def constant_body(self) -> SimpleErrorResponse | None:
+        if self.status >= SERVER_ERROR_FLOOR:
+            return SimpleErrorResponse(error=DEFAULT_SERVER_MESSAGE)
+        return None
+
 
 class _Simple:
     def __call__(self, status: int) -> _SimpleFor:
@@ -39,14 +39,19 @@ class _StructuredFor:
     def __init__(
         self,
         render: Callable[[Exception, int], StructuredErrorResponse],
+        constant: Callable[[int], StructuredErrorResponse | None],
         status: int,
     ) -> None:
         self.render = render
+        self.constant = constant
         self.status = status
 
     def __call__(self, err: Exception) -> StructuredErrorResponse:
         return self.render(err, self.status)
 
+    def constant_body(self) -> StructuredErrorResponse | None:
+        return self.constant(self.status)
+
 
 class _Structured:
     def __init__(
@@ -64,14 +69,23 @@ class _Structured:
         self.server_message = server_message
 
     def __call__(self, status: int) -> _StructuredFor:
-        return _StructuredFor(self._render, status)
+        return _StructuredFor(self._render, self._constant, status)
+
+    def _opaque(self, status: int) -> StructuredErrorResponse:
+        return StructuredErrorResponse(
+            code=status_name(status),
+            message=self.server_message,
+        )
+
+    def _constant(self, status: int) -> StructuredErrorResponse | None:
+        # any exposed type makes the 5xx body depend on err
+        if status >= SERVER_ERROR_FLOOR and not self.exposed_5xx_types:
+            return self._opaque(status)
+        return None
 
     def _render(self, err: Exception, status: int) -> StructuredErrorResponse:
         if status >= SERVER_ERROR_FLOOR and not isinstance(err, self.exposed_5xx_types):
-            return StructuredErrorResponse(
-                code=status_name(status),
-                message=self.server_message,
-            )
+            return self._opaque(status)
         code = self.code(err)
         message = self.message(err)
         details = self.details(err)
@@ -1,10 +1,11 @@
 from collections.abc import Awaitable, Callable, Mapping
-from typing import Any, NewType, TypeAlias, TypeVar
+from typing import Any, NewType, Protocol, TypeAlias, TypeVar, runtime_checkable
 
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.responses import JSONResponse, Response
 
 T = TypeVar("T")
+T_co = TypeVar("T_co", covariant=True)
 
 # Format: "['GET'] /users/{id}".
 RouteLabel = NewType("RouteLabel", str)
@@ -13,10 +14,25 @@ Translator: TypeAlias = Callable[[Exception], T]
 OnError: TypeAlias = Callable[[Exception], Awaitable[None] | None]
 Headers: TypeAlias = Mapping[str, str] | Callable[[Exception], Mapping[str, str]]
 TranslatorFactory: TypeAlias = Callable[[int], Translator[Any]]
+Serializer: TypeAlias = Callable[[Any], bytes]
+Renderer: TypeAlias = type[JSONResponse] | Serializer
 RouteHandler: TypeAlias = Callable[[Request], Awaitable[Response]]
 OpenApiResponses: TypeAlias = dict[int | str, dict[str, Any]]
 
 
+@runtime_checkable
+class ConstantTranslator(Protocol[T_co]):
+    """Translator whose body may not depend on the exception for its status.
+
+    ``constant_body()`` returns that body, or ``None`` when it does depend on it.
+    Called once at build; a constant body is rendered once and reused per error.
+    """
+
+    def __call__(self, err: Exception, /) -> T_co: ...
+
+    def constant_body(self) -> T_co | None: ...
+
+
 class ErrorMapWarning(UserWarning):
     """Suspicious but runnable ``error_map`` entry."""
 
@@ -43,6 +43,15 @@ class ChildError(ParentError): ...
 class OtherClientError(Exception): ...
 
 
+class UnreadableError(Exception):
+    @property
+    def code(self) -> str:
+        raise LookupError("code")
+
+    def __repr__(self) -> str:
+        raise LookupError("repr")
+
+
 class TeapotResponse(TypedDict):
     reason: str
 
@@ -1,13 +1,35 @@
 import asyncio
 import functools
-
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Literal
+
+import anyio
+import anyio.to_thread
 import httpx
 import pytest
 from fastapi import FastAPI
 from starlette import status
-
-from fastapi_error_map import ErrorAwareRouter, RouteConfigError, rule, to_threadpool
-from tests.factories import ClientError
+from starlette.types import Message
+
+from fastapi_error_map import (
+    CallbackPool,
+    Dispatcher,
+    ErrorAwareRouter,
+    ErrorEvent,
+    OnErrorLimit,
+    ProcessPool,
+    RouteConfigError,
+    after_response,
+    limited,
+    rule,
+    shutdown,
+    to_processpool,
+    to_threadpool,
+)
+from tests.factories import ClientError, ServerError, StructuredError
 
 
 def loop_running_here() -> bool:
@@ -187,3 +209,551 @@ def test_to_threadpool_rejects_double_wrap() -> None:
 
     with pytest.raises(RouteConfigError):
         to_threadpool(to_threadpool(record))
+
+
+async def call_asgi(app: FastAPI, path: str, sent: list[Message]) -> None:
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    await app(scope, receive, send)
+
+
+@pytest.mark.parametrize("is_async", [pytest.param(False, id="sync"), True])
+async def test_runs_on_error_after_response_is_sent(
+    is_async: bool,
+    app: FastAPI,
+) -> None:
+    router = ErrorAwareRouter()
+    path = "/after-response/"
+    sent: list[Message] = []
+    sent_before_callback: list[int] = []
+
+    def record(_err: Exception) -> None:
+        sent_before_callback.append(len(sent))
+
+    async def arecord(err: Exception) -> None:
+        record(err)
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                on_error=after_response(arecord if is_async else record),
+            ),
+        },
+    )
+    async def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    await call_asgi(app, path, sent)
+
+    assert sent[0]["status"] == status.HTTP_409_CONFLICT
+    assert sent_before_callback == [len(sent)]
+
+
+async def test_logs_after_response_failure_without_touching_response(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    router = ErrorAwareRouter()
+    path = "/after-response-fails/"
+
+    def bad(_err: Exception) -> None:
+        raise RuntimeError("sink down")
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                on_error=after_response(bad),
+            ),
+        },
+    )
+    async def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    with caplog.at_level(logging.WARNING, logger="fastapi_error_map"):
+        r = await client.get(path)
+
+    assert r.status_code == status.HTTP_409_CONFLICT
+    assert any("on_error failed" in record.message for record in caplog.records)
+
+
+async def test_offloads_after_response_on_error_to_threadpool(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    router = ErrorAwareRouter()
+    path = "/after-response-offloaded/"
+    seen: dict[str, bool] = {}
+
+    def record(_err: Exception) -> None:
+        seen["in_loop"] = loop_running_here()
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                on_error=after_response(to_threadpool(record)),
+            ),
+        },
+    )
+    async def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    await client.get(path)
+
+    assert seen["in_loop"] is False
+
+
+def test_to_threadpool_rejects_after_response_inside() -> None:
+    def record(_err: Exception) -> None: ...
+
+    with pytest.raises(RouteConfigError):
+        to_threadpool(after_response(record))
+
+
+def test_after_response_rejects_double_wrap() -> None:
+    def record(_err: Exception) -> None: ...
+
+    with pytest.raises(RouteConfigError):
+        after_response(after_response(record))
+
+
+async def test_offloads_to_dedicated_pool(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    pool = CallbackPool("audit", max_threads=1)
+    router = ErrorAwareRouter()
+    path = "/pool-offloaded/"
+    seen: dict[str, bool] = {}
+
+    def record(_err: Exception) -> None:
+        seen["in_loop"] = loop_running_here()
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                on_error=to_threadpool(record, pool=pool),
+            ),
+        },
+    )
+    async def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    await client.get(path)
+
+    assert seen["in_loop"] is False
+    assert pool.stats() == (0, 0, 1, 0, 0)
+
+
+@pytest.mark.parametrize(
+    ("pool", "expected"),
+    [
+        pytest.param(
+            CallbackPool("drop", max_threads=1, saturation="drop"),
+            (1, 1, 0),
+            id="drop",
+        ),
+        pytest.param(
+            CallbackPool("wait-full", max_threads=1, max_queued=0),
+            (1, 1, 0),
+            id="wait-full",
+        ),
+        pytest.param(
+            CallbackPool("inline", max_threads=1, saturation="inline"),
+            (1, 0, 1),
+            id="inline",
+        ),
+    ],
+)
+async def test_applies_saturation_policy_when_pool_is_busy(
+    pool: CallbackPool,
+    expected: tuple[int, int, int],
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    router = ErrorAwareRouter()
+    path = "/pool-saturated/"
+    started, release = threading.Event(), threading.Event()
+    inline_calls: list[bool] = []
+
+    def record(_err: Exception) -> None:
+        if started.is_set():
+            inline_calls.append(loop_running_here())
+            return
+        started.set()
+        release.wait(timeout=5)
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                on_error=to_threadpool(record, pool=pool),
+            ),
+        },
+    )
+    async def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    first = asyncio.ensure_future(client.get(path))
+    await anyio.to_thread.run_sync(started.wait)
+    second = await client.get(path)
+    release.set()
+    await first
+
+    stats = pool.stats()
+    assert second.status_code == status.HTTP_409_CONFLICT
+    assert (stats.completed, stats.dropped, stats.inlined) == expected
+    assert inline_calls == [True] * stats.inlined
+
+
+def test_to_threadpool_shares_named_pool() -> None:
+    def record(_err: Exception) -> None: ...
+
+    first = to_threadpool(record, pool="shared-audit")
+    second = to_threadpool(record, pool="shared-audit")
+
+    assert first == second
+    assert CallbackPool.named("shared-audit").stats().completed == 0
+
+
+def test_pool_rejects_unknown_saturation_policy() -> None:
+    with pytest.raises(RouteConfigError):
+        CallbackPool("bad", saturation="block")  # type: ignore[arg-type]
+
+
+def dump_event(path: str, event: ErrorEvent) -> None:
+    # runs in a worker process: module-level, so it pickles by reference
+    Path(path).write_text(
+        json.dumps(
+            {
+                "type_name": event.type_name,
+                "args": event.args,
+                "attributes": event.attributes,
+                "has_traceback": "StructuredError" in (event.traceback or ""),
+            }
+        )
+    )
+
+
+async def test_runs_on_error_in_process_pool_until_app_shutdown(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    tmp_path: Path,
+) -> None:
+    pool = ProcessPool(max_workers=1)
+    out = tmp_path / "event.json"
+    router = ErrorAwareRouter()
+    path = "/process-offloaded/"
+
+    @router.get(
+        path,
+        error_map={
+            StructuredError: rule(
+                status.HTTP_500_INTERNAL_SERVER_ERROR,
+                on_error=to_processpool(
+                    functools.partial(dump_event, str(out)),
+                    pool=pool,
+                    attributes=("code", "details"),
+                ),
+            ),
+        },
+    )
+    async def boom() -> None:
+        raise StructuredError("card", code="declined", details={"k": "v"})
+
+    app.include_router(router)
+
+    async with app.router.lifespan_context(app):
+        r = await client.get(path)
+        assert pool.started
+
+    assert r.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    assert json.loads(out.read_text()) == {
+        "type_name": "tests.factories.StructuredError",
+        "args": ["card"],
+        "attributes": {"code": "declined", "details": "{'k': 'v'}"},
+        "has_traceback": True,
+    }
+    assert not pool.started
+
+
+def test_to_processpool_rejects_unpicklable_on_error() -> None:
+    def local(_event: ErrorEvent) -> None: ...
+
+    with pytest.raises(RouteConfigError, match="worker process"):
+        to_processpool(local)
+
+
+def test_to_processpool_rejects_async_on_error() -> None:
+    async def record(_event: ErrorEvent) -> None: ...
+
+    with pytest.raises(RouteConfigError, match="sync"):
+        to_processpool(record)
+
+
+async def test_dispatcher_runs_higher_status_class_first_and_drops_lowest(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    dispatcher = Dispatcher(workers=1, max_queued=1)
+    router = ErrorAwareRouter()
+    path = "/dispatched/"
+    gate = asyncio.Event()
+    calls: list[str] = []
+
+    async def record(err: Exception) -> None:
+        calls.append(str(err))
+        if str(err) == "first":
+            await gate.wait()
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_404_NOT_FOUND,
+                on_error=dispatcher.queued(record),
+            ),
+            ServerError: rule(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                on_error=dispatcher.queued(record),
+            ),
+        },
+    )
+    async def boom(name: str, server: bool = False) -> None:
+        raise ServerError(name) if server else ClientError(name)
+
+    app.include_router(router)
+
+    await client.get(path, params={"name": "first"})
+    await asyncio.sleep(0)
+    await client.get(path, params={"name": "evicted"})
+    r = await client.get(path, params={"name": "alert", "server": True})
+    await client.get(path, params={"name": "dropped"})
+    gate.set()
+    await shutdown()
+
+    assert r.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert calls == ["first", "alert"]
+    assert dispatcher.stats() == ({"4xx": 0, "5xx": 0}, {"4xx": 2}, 2)
+
+
+def test_dispatcher_rejects_after_response_inside() -> None:
+    def record(_err: Exception) -> None: ...
+
+    with pytest.raises(RouteConfigError):
+        Dispatcher().queued(after_response(record))
+
+
+async def asyncio_hang(_err: Exception) -> None:
+    await asyncio.sleep(60)
+
+
+async def test_cancels_async_on_error_past_timeout(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    limit = OnErrorLimit(timeout=0.05)
+    router = ErrorAwareRouter(on_error=limited(asyncio_hang, limit))
+    path = "/on-error-timeout/"
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: status.HTTP_409_CONFLICT,
+        },
+    )
+    async def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    r = await client.get(path)
+
+    assert r.status_code == status.HTTP_409_CONFLICT
+    assert (limit.stats().timed_out, limit.stats().completed) == (1, 0)
+
+
+@pytest.mark.parametrize(
+    ("saturation", "expected"),
+    [
+        pytest.param("skip", (1, 1, 0), id="skip"),
+        pytest.param("queue", (2, 0, 1), id="queue"),
+    ],
+)
+async def test_applies_concurrency_cap_to_async_on_error(
+    saturation: Literal["skip", "queue"],
+    expected: tuple[int, int, int],
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    limit = OnErrorLimit(max_concurrency=1, saturation=saturation)
+    router = ErrorAwareRouter()
+    path = "/on-error-cap/"
+    started, gate = asyncio.Event(), asyncio.Event()
+
+    async def record(err: Exception) -> None:
+        if str(err) == "first":
+            started.set()
+            await gate.wait()
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                on_error=limited(record, limit),
+            ),
+        },
+    )
+    async def boom(name: str) -> None:
+        raise ClientError(name)
+
+    app.include_router(router)
+
+    first = asyncio.ensure_future(client.get(path, params={"name": "first"}))
+    await started.wait()
+    second = asyncio.ensure_future(client.get(path, params={"name": "second"}))
+    await asyncio.sleep(0.05)
+    gate.set()
+    await asyncio.gather(first, second)
+
+    stats = limit.stats()
+    assert (stats.completed, stats.skipped, stats.queued) == expected
+
+
+def test_limited_rejects_sync_on_error() -> None:
+    def record(_err: Exception) -> None: ...
+
+    with pytest.raises(RouteConfigError, match="async"):
+        limited(record, OnErrorLimit(timeout=1))
+
+
+async def test_fans_out_to_async_sinks_concurrently(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    second_started = asyncio.Event()
+    calls: list[str] = []
+
+    async def first(_err: Exception) -> None:
+        await second_started.wait()  # deadlocks unless both run at once
+        calls.append("first")
+
+    async def second(_err: Exception) -> None:
+        second_started.set()
+        calls.append("second")
+
+    router = ErrorAwareRouter(on_error=[first, second])
+    path = "/fan-out/"
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: status.HTTP_409_CONFLICT,
+        },
+    )
+    async def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    with anyio.fail_after(5):
+        r = await client.get(path)
+
+    assert r.status_code == status.HTTP_409_CONFLICT
+    assert sorted(calls) == ["first", "second"]
+
+
+async def test_isolates_failing_sink_and_applies_markers_per_sink(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    router = ErrorAwareRouter()
+    path = "/fan-out-markers/"
+    seen: dict[str, bool] = {}
+
+    def bad(_err: Exception) -> None:
+        raise RuntimeError("sink down")
+
+    def offloaded(_err: Exception) -> None:
+        seen["offloaded_in_loop"] = loop_running_here()
+
+    def later(_err: Exception) -> None:
+        seen["later"] = True
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                on_error=[bad, to_threadpool(offloaded), after_response(later)],
+            ),
+        },
+    )
+    async def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    with caplog.at_level(logging.WARNING, logger="fastapi_error_map"):
+        r = await client.get(path)
+
+    assert r.status_code == status.HTTP_409_CONFLICT
+    assert seen == {"offloaded_in_loop": False, "later": True}
+    assert [rec.message for rec in caplog.records if "on_error failed" in rec.message]
+
+
+def test_rejects_nested_on_error_lists() -> None:
+    def record(_err: Exception) -> None: ...
+
+    router = ErrorAwareRouter()
+    declare = router.get(
+        "/nested-fan-out/",
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                on_error=[record, [record]],  # type: ignore[list-item]
+            ),
+        },
+    )
+
+    with pytest.raises(RouteConfigError):
+        declare(lambda: None)
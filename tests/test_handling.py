@@ -1,12 +1,14 @@
 import asyncio
 import logging
+import traceback
+import weakref
 
 import httpx
 import pytest
 from fastapi import Depends, FastAPI, HTTPException
 from starlette import status
 
-from fastapi_error_map import ErrorAwareRouter, rule
+from fastapi_error_map import ErrorAwareRouter, ErrorMap, handler, rule, shutdown
 from tests.factories import ChildError, ClientError, ParentError, PlainError
 
 
@@ -112,6 +114,176 @@ async def test_logs_unmapped_exception_by_default(
     assert any("PlainError" in record.message for record in caplog.records)
 
 
+async def test_rate_limits_repeated_unmapped_warnings(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    router = ErrorAwareRouter()
+    path = "/unmapped-storm/"
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: status.HTTP_409_CONFLICT,
+        },
+    )
+    def unmapped() -> None:
+        raise PlainError("x")
+
+    app.include_router(router)
+
+    with caplog.at_level(logging.WARNING, logger="fastapi_error_map"):
+        for _ in range(3):
+            with pytest.raises(PlainError):
+                await client.get(path)
+        assert len(caplog.records) == 1
+        await shutdown()
+
+    assert len(caplog.records) == 2
+    assert "suppressed 2 occurrences" in caplog.records[1].message
+
+
+async def test_summarizes_suppressed_warnings_when_window_closes(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(handler, "UNMAPPED_WARNING_INTERVAL", 0.05)
+    router = ErrorAwareRouter()
+    path = "/unmapped-burst/"
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: status.HTTP_409_CONFLICT,
+        },
+    )
+    def unmapped() -> None:
+        raise PlainError("x")
+
+    app.include_router(router)
+
+    with caplog.at_level(logging.WARNING, logger="fastapi_error_map"):
+        for _ in range(3):
+            with pytest.raises(PlainError):
+                await client.get(path)
+        await asyncio.sleep(0.1)  # no further requests: the timer reports
+
+    messages = [record.message for record in caplog.records]
+    assert len(messages) == 2
+    assert "suppressed 2 occurrences in last 0s" in messages[1]
+
+
+async def test_summarizes_suppressed_warnings_when_window_rolls_over(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(handler, "UNMAPPED_WARNING_INTERVAL", 0.05)
+    router = ErrorAwareRouter()
+    path = "/unmapped-rollover/"
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: status.HTTP_409_CONFLICT,
+        },
+    )
+    def unmapped() -> None:
+        raise PlainError("x")
+
+    app.include_router(router)
+
+    with caplog.at_level(logging.WARNING, logger="fastapi_error_map"):
+        for pause in (0, 0, 0.1):
+            await asyncio.sleep(pause)
+            with pytest.raises(PlainError):
+                await client.get(path)
+
+    messages = [record.message for record in caplog.records]
+    assert len(messages) == 3
+    assert "suppressed 1 occurrences" in messages[1]
+    assert "add it to error_map" in messages[2]
+
+
+async def test_summarizes_on_next_warning_without_asyncio_loop(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # as on AnyIO's trio backend: no loop to set the summary timer on
+    monkeypatch.setattr("fastapi_error_map.handler._asyncio_loop", lambda: None)
+    monkeypatch.setattr(handler, "UNMAPPED_WARNING_INTERVAL", 0.05)
+    router = ErrorAwareRouter()
+    path = "/unmapped-no-timer/"
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: status.HTTP_409_CONFLICT,
+        },
+    )
+    def unmapped() -> None:
+        raise PlainError("x")
+
+    app.include_router(router)
+
+    with caplog.at_level(logging.WARNING, logger="fastapi_error_map"):
+        for _ in range(3):
+            with pytest.raises(PlainError):
+                await client.get(path)
+        await asyncio.sleep(0.1)
+        assert len(caplog.records) == 1
+        with pytest.raises(PlainError):
+            await client.get(path)
+
+    messages = [record.message for record in caplog.records]
+    assert len(messages) == 3
+    assert "suppressed 2 occurrences" in messages[1]
+    assert "add it to error_map" in messages[2]
+
+
+async def test_drops_oldest_warning_window_past_type_cap(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(handler, "UNMAPPED_WARNING_TYPES", 1)
+    router = ErrorAwareRouter()
+    path = "/unmapped-types/"
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: status.HTTP_409_CONFLICT,
+        },
+    )
+    def unmapped(child: bool = False) -> None:
+        raise ChildError("x") if child else PlainError("x")
+
+    app.include_router(router)
+
+    with caplog.at_level(logging.WARNING, logger="fastapi_error_map"):
+        for child in (False, False, True, False):
+            with pytest.raises(Exception, match="x"):
+                await client.get(path, params={"child": child})
+        await shutdown()
+
+    messages = [record.message for record in caplog.records]
+    assert len(messages) == 4
+    assert "Unmapped PlainError" in messages[0]
+    assert "PlainError" in messages[1]
+    assert "suppressed 1 occurrences" in messages[1]
+    assert "Unmapped ChildError" in messages[2]
+    assert "Unmapped PlainError" in messages[3]
+    assert "add it to error_map" in messages[3]
+
+
 async def test_stays_silent_on_unmapped_when_disabled(
     app: FastAPI,
     client: httpx.AsyncClient,
@@ -390,3 +562,111 @@ async def test_broad_ancestor_does_not_hijack_http_exception(
 
     assert r.status_code == status.HTTP_404_NOT_FOUND
     assert r.json() == {"detail": "gone"}
+
+
+class ForbiddenClientError(HTTPException, ClientError): ...
+
+
+@pytest.mark.parametrize(
+    "mapping",
+    [
+        pytest.param({ClientError: status.HTTP_409_CONFLICT}, id="single"),
+        pytest.param(
+            {
+                ClientError: status.HTTP_409_CONFLICT,
+                PlainError: status.HTTP_400_BAD_REQUEST,
+            },
+            id="multi",
+        ),
+        pytest.param(
+            {ClientError: rule(status.HTTP_409_CONFLICT, on_error=lambda _err: None)},
+            id="on_error",
+        ),
+    ],
+)
+async def test_http_exception_with_mapped_base_passes_through(
+    mapping: ErrorMap,
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    router = ErrorAwareRouter()
+    path = "/http-exc-mapped-base/"
+
+    @router.get(path, error_map=mapping)
+    def boom() -> None:
+        raise ForbiddenClientError(status.HTTP_403_FORBIDDEN, detail="nope")
+
+    app.include_router(router)
+
+    r = await client.get(path)
+
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+    assert r.json() == {"detail": "nope"}
+
+
+@pytest.mark.parametrize(
+    "mapping",
+    [
+        pytest.param({ClientError: status.HTTP_409_CONFLICT}, id="single"),
+        pytest.param(
+            {
+                ClientError: status.HTTP_409_CONFLICT,
+                PlainError: status.HTTP_400_BAD_REQUEST,
+            },
+            id="multi",
+        ),
+    ],
+)
+async def test_http_exception_is_not_logged_as_unmapped(
+    mapping: dict[type[Exception], int],
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    router = ErrorAwareRouter()
+    path = "/http-exc-quiet/"
+
+    @router.get(path, error_map=mapping)
+    def boom() -> None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    app.include_router(router)
+
+    with caplog.at_level(logging.WARNING, logger="fastapi_error_map"):
+        r = await client.get(path)
+
+    assert r.status_code == status.HTTP_404_NOT_FOUND
+    assert caplog.records == []
+
+
+class Payload:
+    pass
+
+
+async def test_releases_endpoint_locals_of_translated_exception(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    router = ErrorAwareRouter()
+    path = "/releases-locals/"
+    kept: list[Exception] = []
+    payloads: list[weakref.ref[Payload]] = []
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(status.HTTP_409_CONFLICT, on_error=kept.append),
+        },
+    )
+    async def boom() -> None:
+        payload = Payload()
+        payloads.append(weakref.ref(payload))
+        raise ClientError("nope")
+
+    app.include_router(router)
+
+    r = await client.get(path)
+
+    assert r.status_code == status.HTTP_409_CONFLICT
+    assert payloads[0]() is None
+    assert "in boom" in "".join(traceback.format_exception(kept[0]))
@@ -4,6 +4,7 @@ import httpx
 import pytest
 from fastapi import FastAPI
 from starlette import status
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from fastapi_error_map import ErrorAwareRouter, Headers, rule
 from tests.factories import ClientError
@@ -125,3 +126,85 @@ async def test_content_type_header_overrides_json_default(
     r = await client.get(path)
 
     assert r.headers["content-type"] == "application/problem+json"
+
+
+async def test_prebuilt_5xx_headers_are_not_shared_between_responses(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    router = ErrorAwareRouter()
+    path = "/prebuilt-headers/"
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "30"},
+            ),
+        },
+    )
+    def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    class AppendHopHeader:
+        def __init__(self, app: ASGIApp) -> None:
+            self.app = app
+
+        async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+            async def send_with_hop(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    message["headers"].append((b"x-hop", b"1"))
+                await send(message)
+
+            await self.app(scope, receive, send_with_hop)
+
+    app.add_middleware(AppendHopHeader)
+
+    await client.get(path)
+    r = await client.get(path)
+
+    assert r.json() == {"error": "Internal server error"}
+    assert r.headers.get_list("x-hop") == ["1"]
+    assert r.headers["Retry-After"] == "30"
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        pytest.param({"Content-Type": "application/problem+json"}, id="static"),
+        pytest.param(
+            lambda _err: {"Content-Type": "application/problem+json"},
+            id="dynamic",
+        ),
+    ],
+)
+async def test_raw_headers_carry_one_content_type_and_length(
+    headers: Headers,
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    router = ErrorAwareRouter()
+    path = "/raw-headers/"
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                headers=headers,
+            ),
+        },
+    )
+    def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    r = await client.get(path)
+
+    assert r.headers.get_list("content-type") == ["application/problem+json"]
+    assert r.headers.get_list("content-length") == [str(len(r.content))]
+    assert r.json() == {"error": "x"}
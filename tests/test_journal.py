@@ -0,0 +1,269 @@
+import asyncio
+import errno
+import os
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from starlette import status
+
+from fastapi_error_map import (
+    ErrorAwareRouter,
+    Journal,
+    read_journal,
+    rule,
+    shutdown,
+)
+from fastapi_error_map.__main__ import main
+from tests.factories import ClientError, ServerError
+
+
+def segment_names(directory: Path) -> list[str]:
+    return sorted(segment.name for segment in directory.glob("segment-*.journal"))
+
+
+def tear_tail(directory: Path) -> None:
+    # a record header promising 256 bytes, cut short — as after a crash mid-write
+    (segment,) = directory.glob("segment-*.journal")
+    with segment.open("ab") as file:
+        file.write(b"\x00\x00\x01\x00partial")
+
+
+async def test_journals_errors_at_or_above_min_status(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    tmp_path: Path,
+) -> None:
+    journal = Journal(tmp_path, min_status=500, max_delay_ms=60_000)
+    path = "/journaled/"
+    router = ErrorAwareRouter(on_error=journal)
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: status.HTTP_409_CONFLICT,
+            ServerError: status.HTTP_503_SERVICE_UNAVAILABLE,
+        },
+    )
+    async def boom(server: bool = False) -> None:
+        raise ServerError("down") if server else ClientError("x")
+
+    app.include_router(router)
+
+    for server in (True, False, True):
+        await client.get(path, params={"server": server})
+    await shutdown()
+
+    events = list(read_journal(tmp_path))
+    assert [(e.route, e.status, e.args) for e in events] == [
+        (f"['GET'] {path}", status.HTTP_503_SERVICE_UNAVAILABLE, ("down",)),
+    ] * 2
+    assert events[0].type_name == "tests.factories.ServerError"
+
+
+async def test_rotates_segments_and_drops_oldest_past_cap(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    tmp_path: Path,
+) -> None:
+    journal = Journal(tmp_path, segment_bytes=1, max_bytes=1, max_batch=1)
+    path = "/journal-rotation/"
+    router = ErrorAwareRouter(on_error=journal)
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: status.HTTP_409_CONFLICT,
+            ServerError: status.HTTP_503_SERVICE_UNAVAILABLE,
+        },
+    )
+    async def boom(server: bool = False) -> None:
+        raise ServerError("down") if server else ClientError("x")
+
+    app.include_router(router)
+
+    for _ in range(3):
+        await client.get(path, params={"server": True})
+        await journal.aclose()
+
+    assert segment_names(tmp_path) == [f"segment-00000003-{os.getpid()}.journal"]
+    assert len(list(read_journal(tmp_path))) == 1
+
+
+async def test_workers_sharing_directory_keep_to_their_own_segments(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    tmp_path: Path,
+) -> None:
+    other_worker = tmp_path / "segment-00000005-999999999.journal"
+    other_worker.touch()
+    journal = Journal(tmp_path, segment_bytes=1, max_bytes=1, max_batch=1)
+    path = "/journal-shared/"
+    router = ErrorAwareRouter(on_error=journal)
+
+    @router.get(
+        path,
+        error_map={
+            ServerError: status.HTTP_503_SERVICE_UNAVAILABLE,
+        },
+    )
+    async def boom() -> None:
+        raise ServerError("down")
+
+    app.include_router(router)
+
+    for _ in range(2):
+        await client.get(path)
+        await journal.aclose()
+
+    assert segment_names(tmp_path) == [
+        other_worker.name,
+        f"segment-00000007-{os.getpid()}.journal",
+    ]
+
+
+async def test_retries_next_segment_when_name_is_taken(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    first, second = Journal(tmp_path), Journal(tmp_path)
+    router = ErrorAwareRouter()
+
+    @router.get(
+        "/journal-first/",
+        error_map={
+            ServerError: rule(status.HTTP_503_SERVICE_UNAVAILABLE, on_error=first),
+        },
+    )
+    async def boom() -> None:
+        raise ServerError("down")
+
+    @router.get(
+        "/journal-second/",
+        error_map={
+            ServerError: rule(status.HTTP_503_SERVICE_UNAVAILABLE, on_error=second),
+        },
+    )
+    async def boom_again() -> None:
+        raise ServerError("down")
+
+    app.include_router(router)
+
+    await client.get("/journal-first/")
+    await first.aclose()
+    # as if the first segment appeared after the second writer listed the directory
+    monkeypatch.setattr("fastapi_error_map.journal._segments", lambda _dir: [])
+    await client.get("/journal-second/")
+    await second.aclose()
+    monkeypatch.undo()
+
+    assert len(segment_names(tmp_path)) == 2
+    assert len(list(read_journal(tmp_path))) == 2
+
+
+async def test_starts_new_segment_after_failed_write(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    journal = Journal(tmp_path, max_batch=1)
+    path = "/journal-enospc/"
+    router = ErrorAwareRouter(on_error=journal)
+
+    @router.get(
+        path,
+        error_map={
+            ServerError: status.HTTP_503_SERVICE_UNAVAILABLE,
+        },
+    )
+    async def boom(n: int = 0) -> None:
+        raise ServerError(f"down {n}")
+
+    app.include_router(router)
+    fsync = os.fsync
+
+    def disk_full(fd: int) -> None:
+        os.write(fd, b"\x00\x00\x01\x00partial")  # torn record
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    for n in range(3):
+        monkeypatch.setattr(os, "fsync", disk_full if n == 1 else fsync)
+        await client.get(path, params={"n": n})
+        await asyncio.sleep(0.1)  # let the batch flush before the next one
+    await shutdown()
+
+    assert len(segment_names(tmp_path)) == 2
+    assert [event.args for event in read_journal(tmp_path)] == [
+        ("down 0",),
+        ("down 1",),
+        ("down 2",),
+    ]
+
+
+async def test_reader_stops_at_torn_tail(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    tmp_path: Path,
+) -> None:
+    journal = Journal(tmp_path)
+    path = "/journal-torn/"
+    router = ErrorAwareRouter(on_error=journal)
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: status.HTTP_409_CONFLICT,
+            ServerError: status.HTTP_503_SERVICE_UNAVAILABLE,
+        },
+    )
+    async def boom(server: bool = False) -> None:
+        raise ServerError("down") if server else ClientError("x")
+
+    app.include_router(router)
+
+    for _ in range(2):
+        await client.get(path)
+    await shutdown()
+    tear_tail(tmp_path)
+
+    assert len(list(read_journal(tmp_path))) == 2
+
+
+async def test_summarizes_journal_from_command_line(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    journal = Journal(tmp_path)
+    path = "/journal-summary/"
+    router = ErrorAwareRouter(on_error=journal)
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: status.HTTP_409_CONFLICT,
+            ServerError: status.HTTP_503_SERVICE_UNAVAILABLE,
+        },
+    )
+    async def boom(server: bool = False) -> None:
+        raise ServerError("down") if server else ClientError("x")
+
+    app.include_router(router)
+
+    for server in (True, True, False):
+        await client.get(path, params={"server": server})
+    await shutdown()
+
+    assert main(["summarize", str(tmp_path), "--by", "type,status"]) == 0
+
+    assert capsys.readouterr().out.splitlines() == [
+        "count  type                         status",
+        "2      tests.factories.ServerError  503",
+        "1      tests.factories.ClientError  409",
+        "3 errors",
+    ]
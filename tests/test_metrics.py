@@ -0,0 +1,260 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+from pathlib import Path
+
+import anyio
+import anyio.to_thread
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI, HTTPException
+from starlette import status
+
+from fastapi_error_map import (
+    ErrorAwareRoute,
+    ErrorAwareRouter,
+    ErrorMetrics,
+    RouteConfigError,
+    SharedMetricsFile,
+    error_map,
+    rule,
+)
+from tests.factories import ClientError, PlainError, ServerError
+
+
+@pytest.mark.parametrize("on_error", [pytest.param(False, id="sync"), True])
+async def test_counts_translated_unmapped_and_passed_through(
+    on_error: bool,
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    metrics = ErrorMetrics()
+    router = ErrorAwareRouter(metrics=metrics)
+    path = "/counted/"
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                on_error=(lambda _err: None) if on_error else None,
+            ),
+            ServerError: status.HTTP_503_SERVICE_UNAVAILABLE,
+        },
+    )
+    def boom(kind: str) -> None:
+        if kind == "client":
+            raise ClientError("x")
+        if kind == "server":
+            raise ServerError("x")
+        if kind == "http":
+            raise HTTPException(status.HTTP_404_NOT_FOUND)
+        raise PlainError("x")
+
+    app.include_router(router)
+
+    for kind in ("client", "client", "server", "http"):
+        await client.get(path, params={"kind": kind})
+    with pytest.raises(PlainError):
+        await client.get(path, params={"kind": "plain"})
+
+    stats = metrics.stats()[f"['GET'] {path}"]
+    assert stats.translated == {
+        ("tests.factories.ClientError", 409): 2,
+        ("tests.factories.ServerError", 503): 1,
+    }
+    assert stats.unmapped == {"tests.factories.PlainError": 1}
+    assert stats.passed_through == {f"{HTTPException.__module__}.HTTPException": 1}
+    assert stats.duration.total == 3
+    assert stats.duration.buckets[-1] == (float("inf"), 3)
+    assert stats.duration.sum > 0
+
+
+async def test_renders_prometheus_text(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    metrics = ErrorMetrics(buckets=(0.5, 1.0))
+    router = ErrorAwareRouter(metrics=metrics)
+    path = "/scraped/"
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: status.HTTP_409_CONFLICT,
+        },
+    )
+    def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    await client.get(path)
+
+    text = metrics.render_prometheus()
+    route = f"['GET'] {path}"
+    assert (
+        f'fastapi_error_map_translated_total{{route="{route}",'
+        f'exception="tests.factories.ClientError",status="409"}} 1'
+    ) in text.splitlines()
+    assert "# TYPE fastapi_error_map_error_path_seconds histogram" in text
+    assert (
+        f'fastapi_error_map_error_path_seconds_bucket{{route="{route}",le="+Inf"}} 1'
+    ) in text.splitlines()
+    assert f'fastapi_error_map_error_path_seconds_count{{route="{route}"}} 1' in text
+    assert text.endswith("\n")
+
+
+async def test_decorator_carries_metrics(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    metrics = ErrorMetrics()
+    router = APIRouter(route_class=ErrorAwareRoute)
+    path = "/counted-decorator/"
+
+    @router.get(path)
+    @error_map({ClientError: status.HTTP_409_CONFLICT}, metrics=metrics)
+    def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    await client.get(path)
+
+    stats = metrics.stats()[f"['GET'] {path}"]
+    assert stats.translated == {("tests.factories.ClientError", 409): 1}
+
+
+def test_rejects_unordered_buckets() -> None:
+    with pytest.raises(RouteConfigError, match="buckets"):
+        ErrorMetrics(buckets=(1.0, 0.5))
+
+
+def count_in_worker(path: str, kinds: list[str], max_workers: int) -> None:
+    # runs in a spawned process: one app worker with its own slot
+    async def serve() -> None:
+        app = FastAPI()
+        shared = SharedMetricsFile(path, max_workers=max_workers)
+        router = ErrorAwareRouter(metrics=ErrorMetrics(shared=shared))
+
+        @router.get(
+            "/shared/",
+            error_map={
+                ClientError: status.HTTP_409_CONFLICT,
+                ServerError: status.HTTP_503_SERVICE_UNAVAILABLE,
+            },
+        )
+        def boom(kind: str) -> None:
+            raise ClientError("x") if kind == "client" else ServerError("x")
+
+        app.include_router(router)
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            for kind in kinds:
+                await client.get("/shared/", params={"kind": kind})
+
+    asyncio.run(serve())
+
+
+def run_worker(path: Path, kinds: list[str], *, max_workers: int) -> None:
+    worker = multiprocessing.get_context("spawn").Process(
+        target=count_in_worker, args=(str(path), kinds, max_workers)
+    )
+    worker.start()
+    worker.join()
+    assert worker.exitcode == 0
+
+
+async def test_aggregates_counts_across_workers(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    tmp_path: Path,
+) -> None:
+    shared = SharedMetricsFile(tmp_path / "errors.metrics", max_workers=2)
+    metrics = ErrorMetrics(shared=shared)
+    router = ErrorAwareRouter(metrics=metrics)
+
+    @router.get(
+        "/shared/",
+        error_map={
+            ClientError: status.HTTP_409_CONFLICT,
+            ServerError: status.HTTP_503_SERVICE_UNAVAILABLE,
+        },
+    )
+    def boom(kind: str) -> None:
+        raise ClientError("x") if kind == "client" else ServerError("x")
+
+    app.include_router(router)
+
+    await client.get("/shared/", params={"kind": "client"})
+    await anyio.to_thread.run_sync(
+        functools.partial(
+            run_worker,
+            tmp_path / "errors.metrics",
+            ["client", "client", "server"],
+            max_workers=2,
+        )
+    )
+
+    stats = metrics.stats()["['GET'] /shared/"]
+    assert stats.translated == {
+        ("tests.factories.ClientError", 409): 3,
+        ("tests.factories.ServerError", 503): 1,
+    }
+    assert stats.duration.total == 4
+    shared.close()
+
+
+async def test_next_worker_adopts_slot_of_dead_one(tmp_path: Path) -> None:
+    path = tmp_path / "errors.metrics"
+    for _ in range(2):
+        await anyio.to_thread.run_sync(
+            functools.partial(run_worker, path, ["client"], max_workers=1)
+        )
+
+    reader = SharedMetricsFile(path, max_workers=1)
+    stats = ErrorMetrics(shared=reader).stats()["['GET'] /shared/"]
+    assert stats.translated == {("tests.factories.ClientError", 409): 2}
+    reader.close()
+
+
+def test_instances_in_one_process_take_separate_slots(
+    tmp_path: Path,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    first = SharedMetricsFile(tmp_path / "errors.metrics", max_workers=1)
+    second = SharedMetricsFile(tmp_path / "errors.metrics", max_workers=1)
+
+    with caplog.at_level(logging.WARNING, logger="fastapi_error_map"):
+        first.add("errors", 1.0)
+        second.add("errors", 1.0)
+
+    assert first.totals() == {"errors": 1.0}
+    assert "worker slots are taken" in caplog.records[0].message
+    second.close()
+    first.close()
+
+
+async def test_closing_one_instance_keeps_the_others_slot(tmp_path: Path) -> None:
+    path = tmp_path / "errors.metrics"
+    held = SharedMetricsFile(path, max_workers=1)
+    held.add("errors", 1.0)
+    SharedMetricsFile(path, max_workers=1).close()
+
+    # the slot is still held: a worker starting now finds none free
+    await anyio.to_thread.run_sync(
+        functools.partial(run_worker, path, ["client"], max_workers=1)
+    )
+
+    assert held.totals() == {"errors": 1.0}
+    held.close()
+
+
+def test_rejects_shared_file_of_another_layout(tmp_path: Path) -> None:
+    SharedMetricsFile(tmp_path / "errors.metrics", max_workers=2).close()
+
+    with pytest.raises(RouteConfigError, match="another layout"):
+        SharedMetricsFile(tmp_path / "errors.metrics", max_workers=4)
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import time
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI
+from starlette import status
+
+from fastapi_error_map import (
+    ErrorAwareRoute,
+    ErrorAwareRouter,
+    ErrorMetrics,
+    ErrorPathTimings,
+    PhaseProfiler,
+    Sampler,
+    after_response,
+    error_map,
+    fixed_rate,
+    rule,
+)
+from tests.factories import ClientError, ServerError
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.timings: list[ErrorPathTimings] = []
+
+    def record(self, timings: ErrorPathTimings) -> None:
+        self.timings.append(timings)
+
+
+async def test_reports_phase_timings_of_translated_errors(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    recorder = Recorder()
+    router = ErrorAwareRouter(profiler=recorder)
+    path = "/profiled/"
+    later: list[Exception] = []
+
+    async def slow_report(_err: Exception) -> None:
+        await asyncio.sleep(0.02)
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                on_error=[slow_report, after_response(later.append)],
+            ),
+        },
+    )
+    async def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    r = await client.get(path)
+
+    assert r.status_code == status.HTTP_409_CONFLICT
+    assert r.json() == {"error": "x"}
+    assert len(later) == 1
+    (timings,) = recorder.timings
+    assert (timings.route, timings.exc_type, timings.status) == (
+        f"['GET'] {path}",
+        ClientError,
+        status.HTTP_409_CONFLICT,
+    )
+    assert timings.on_error >= 0.02
+    assert min(timings[3:]) >= 0
+    assert timings.total >= timings.on_error
+
+
+class FailingProfiler:
+    def record(self, timings: ErrorPathTimings) -> None:
+        raise RuntimeError("profiler down")
+
+
+async def test_failing_profiler_leaves_response_intact(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    router = ErrorAwareRouter(profiler=FailingProfiler())
+    path = "/profiled-failing/"
+
+    @router.get(path, error_map={ClientError: status.HTTP_409_CONFLICT})
+    def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    with caplog.at_level(logging.WARNING, logger="fastapi_error_map"):
+        r = await client.get(path)
+
+    assert r.status_code == status.HTTP_409_CONFLICT
+    assert r.json() == {"error": "x"}
+    assert "profiler failed" in caplog.records[0].message
+
+
+async def test_phase_profiler_reports_slowest_phase_per_route(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    profiler = PhaseProfiler()
+    router = ErrorAwareRouter(profiler=profiler)
+
+    def slow_translate(err: Exception) -> str:
+        time.sleep(0.01)
+        return str(err)
+
+    @router.get(
+        "/slow-translate/",
+        error_map={
+            ServerError: rule(
+                status.HTTP_503_SERVICE_UNAVAILABLE, translator=slow_translate
+            ),
+        },
+    )
+    async def boom() -> None:
+        raise ServerError("x")
+
+    app.include_router(router)
+
+    for _ in range(2):
+        await client.get("/slow-translate/")
+
+    (row,) = profiler.slowest()
+    assert (row.route, row.phase, row.errors) == (
+        "['GET'] /slow-translate/",
+        "translate",
+        2,
+    )
+    assert row.mean >= 0.01
+    report = profiler.report(top=5).splitlines()
+    assert report[0].split() == [
+        "route",
+        "phase",
+        "mean",
+        "ms",
+        "max",
+        "ms",
+        "share",
+        "errors",
+    ]
+    assert "translate" in report[1]
+
+
+async def test_decorator_carries_profiler(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    recorder = Recorder()
+    router = APIRouter(route_class=ErrorAwareRoute)
+    path = "/profiled-decorator/"
+
+    @router.get(path)
+    @error_map({ClientError: status.HTTP_409_CONFLICT}, profiler=recorder)
+    def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    await client.get(path)
+
+    (timings,) = recorder.timings
+    assert (timings.route, timings.status) == (f"['GET'] {path}", 409)
+
+
+async def test_server_timing_header_on_mapped_errors(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    router = ErrorAwareRouter(server_timing=True)
+    path = "/server-timing/"
+
+    @router.get(path, error_map={ClientError: status.HTTP_409_CONFLICT})
+    async def boom(fail: bool) -> str:
+        await asyncio.sleep(0.01)
+        if fail:
+            raise ClientError("x")
+        return "ok"
+
+    app.include_router(router)
+
+    failed = await client.get(path, params={"fail": True})
+    ok = await client.get(path, params={"fail": False})
+
+    assert failed.status_code == status.HTTP_409_CONFLICT
+    assert failed.json() == {"error": "x"}
+    metrics = dict(
+        entry.split(";dur=") for entry in failed.headers["server-timing"].split(", ")
+    )
+    assert list(metrics) == ["endpoint", "on_error", "translate", "serialize"]
+    assert float(metrics["endpoint"]) >= 10
+    assert "server-timing" not in ok.headers
+
+
+async def test_server_timing_counts_each_error_once_in_metrics(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    metrics = ErrorMetrics()
+    router = APIRouter(route_class=ErrorAwareRoute)
+    path = "/server-timing-counted/"
+
+    @router.get(path)
+    @error_map(
+        {ClientError: status.HTTP_409_CONFLICT}, metrics=metrics, server_timing=True
+    )
+    def boom(fail: bool) -> None:
+        if fail:
+            raise ClientError("x")
+        raise ServerError("x")
+
+    app.include_router(router)
+
+    r = await client.get(path, params={"fail": True})
+    with pytest.raises(ServerError):
+        await client.get(path, params={"fail": False})
+
+    assert "endpoint;dur=" in r.headers["server-timing"]
+    stats = metrics.stats()[f"['GET'] {path}"]
+    assert stats.translated == {("tests.factories.ClientError", 409): 1}
+    assert stats.unmapped == {"tests.factories.ServerError": 1}
+    assert stats.duration.total == 1
+
+
+@pytest.mark.parametrize(
+    "server_timing",
+    [pytest.param(False, id="default"), pytest.param(fixed_rate(0.0), id="sampled")],
+)
+async def test_no_server_timing_header_unless_admitted(
+    server_timing: bool | Sampler,
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    router = ErrorAwareRouter(server_timing=server_timing)
+    path = "/no-server-timing/"
+
+    @router.get(path, error_map={ClientError: status.HTTP_409_CONFLICT})
+    def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    r = await client.get(path)
+
+    assert r.status_code == status.HTTP_409_CONFLICT
+    assert "server-timing" not in r.headers
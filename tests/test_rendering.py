@@ -0,0 +1,292 @@
+import json
+from decimal import Decimal
+from typing import Any
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+)
+from pydantic import BaseModel, Field
+from starlette import status
+
+from fastapi_error_map import ErrorAwareRouter, RouteConfigError, responses, rule
+from tests.factories import ClientError, ServerError, teapot
+
+
+class TaggedJSONResponse(JSONResponse):
+    media_type = "application/vnd.tagged+json"
+
+
+def tagged_dumps(body: Any) -> bytes:
+    return json.dumps({"tagged": body}).encode()
+
+
+async def test_inherits_app_default_response_class() -> None:
+    app = FastAPI(default_response_class=TaggedJSONResponse)
+    router = ErrorAwareRouter()
+    path = "/inherited-class/"
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: status.HTTP_409_CONFLICT,
+            ServerError: status.HTTP_503_SERVICE_UNAVAILABLE,
+        },
+    )
+    def boom(server: bool = False) -> None:
+        raise ServerError("x") if server else ClientError("x")
+
+    app.include_router(router)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://test",
+    ) as client:
+        client_side = await client.get(path)
+        server_side = await client.get(path, params={"server": True})
+
+    assert client_side.headers["content-type"] == "application/vnd.tagged+json"
+    assert server_side.headers["content-type"] == "application/vnd.tagged+json"
+    assert client_side.json() == {"error": "x"}
+
+
+async def test_falls_back_to_json_for_non_json_route_response_class(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    router = ErrorAwareRouter()
+    path = "/html-route/"
+
+    @router.get(
+        path,
+        response_class=HTMLResponse,
+        error_map={
+            ClientError: status.HTTP_409_CONFLICT,
+        },
+    )
+    def boom() -> str:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    r = await client.get(path)
+
+    assert r.headers["content-type"] == "application/json"
+    assert r.json() == {"error": "x"}
+
+
+async def test_rule_serializer_overrides_router_renderer(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    router = ErrorAwareRouter(renderer=TaggedJSONResponse)
+    path = "/rule-serializer/"
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                renderer=tagged_dumps,
+            ),
+        },
+    )
+    def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    r = await client.get(path)
+
+    assert r.headers["content-type"] == "application/json"
+    assert r.json() == {"tagged": {"error": "x"}}
+
+
+async def test_skips_jsonable_encoder_when_disabled(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    seen: list[type[Any]] = []
+
+    class Native(dict[str, str]): ...
+
+    def recording_dumps(body: Any) -> bytes:
+        seen.append(type(body))
+        return json.dumps(body).encode()
+
+    router = ErrorAwareRouter(renderer=recording_dumps, jsonable=False)
+    path = "/no-jsonable/"
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                translator=lambda err: Native(error=str(err)),
+                openapi_model=dict[str, str],
+            ),
+        },
+    )
+    def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    r = await client.get(path)
+
+    assert r.json() == {"error": "x"}
+    assert seen == [Native]
+
+
+def test_fails_for_renderer_type_that_is_not_a_response() -> None:
+    router = ErrorAwareRouter()
+    path = "/bad-renderer/"
+
+    declare = router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                renderer=str,  # type: ignore[arg-type]
+            ),
+        },
+    )
+
+    def boom() -> None:
+        raise ClientError("x")
+
+    with pytest.raises(RouteConfigError, match=path):
+        declare(boom)
+
+
+class PrefixedJSONResponse(JSONResponse):
+    def __init__(self, content: Any, prefix: str = ")]}'\n") -> None:
+        self.prefix = prefix.encode()
+        super().__init__(content)
+
+    def render(self, content: Any) -> bytes:
+        return self.prefix + super().render(content)
+
+
+@pytest.mark.parametrize("renderer", [PlainTextResponse, PrefixedJSONResponse])
+def test_fails_at_declaration_for_renderer_that_cannot_render_json(
+    renderer: type[Response],
+) -> None:
+    router = ErrorAwareRouter()
+    path = "/unrenderable/"
+
+    declare = router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                renderer=renderer,  # type: ignore[arg-type]
+            ),
+        },
+    )
+
+    def boom() -> None:
+        raise ClientError("x")
+
+    with pytest.raises(RouteConfigError, match=renderer.__name__):
+        declare(boom)
+
+
+async def test_serializes_body_by_model(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    router = ErrorAwareRouter(serialize_by_model=True)
+    path = "/by-model/"
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_418_IM_A_TEAPOT,
+                translator=teapot,
+            ),
+            ServerError: status.HTTP_503_SERVICE_UNAVAILABLE,
+        },
+    )
+    def boom(server: bool = False) -> None:
+        raise ServerError("x") if server else ClientError("brewing")
+
+    app.include_router(router)
+
+    teapot_side = await client.get(path)
+    server_side = await client.get(path, params={"server": True})
+
+    assert teapot_side.json() == {"reason": "brewing"}
+    assert server_side.json() == {"error": "Internal server error"}
+
+
+class Refund(BaseModel):
+    amount: Decimal
+    order_id: int = Field(alias="orderId")
+
+
+class LateRefund(Refund):
+    days_late: int
+
+
+@pytest.mark.parametrize(
+    ("body", "by_model"),
+    [
+        pytest.param(Refund(amount=Decimal("1.5"), orderId=7), True, id="model"),
+        pytest.param(
+            {"amount": Decimal("1.5"), "orderId": 7, "extra": 2},
+            False,
+            id="dict-with-extra-key",
+        ),
+        pytest.param(
+            LateRefund(amount=Decimal("1.5"), orderId=7, days_late=3),
+            False,
+            id="subclass",
+        ),
+    ],
+)
+async def test_model_serialization_keeps_wire_output(
+    body: Any,
+    by_model: bool,
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    paths = {False: "/refund-generic/", True: "/refund-by-model/"}
+    for serialize_by_model, path in paths.items():
+        router = ErrorAwareRouter(serialize_by_model=serialize_by_model)
+
+        @router.get(
+            path,
+            error_map={
+                ClientError: rule(
+                    status.HTTP_409_CONFLICT,
+                    translator=lambda _err: body,
+                    openapi_model=Refund,
+                ),
+            },
+        )
+        def boom() -> None:
+            raise ClientError("x")
+
+        app.include_router(router)
+
+    generic = await client.get(paths[False])
+    encoded: list[Any] = []
+
+    def recording_encoder(obj: Any) -> Any:
+        encoded.append(obj)
+        return jsonable_encoder(obj)
+
+    monkeypatch.setattr(responses, "jsonable_encoder", recording_encoder)
+    model_path = await client.get(paths[True])
+
+    assert model_path.content == generic.content
+    assert encoded == ([] if by_model else [body])
@@ -0,0 +1,120 @@
+from typing import ClassVar
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from starlette import status
+
+from fastapi_error_map import ErrorAwareRoute, error_map
+from tests.factories import (
+    ChildError,
+    ClientError,
+    OtherClientError,
+    ParentError,
+    PlainError,
+)
+
+
+def route_at(app: FastAPI, path: str) -> ErrorAwareRoute:
+    (route,) = [r for r in app.routes if getattr(r, "path", None) == path]
+    assert isinstance(route, ErrorAwareRoute)
+    return route
+
+
+async def test_resolves_each_exception_type_once(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    app.router.route_class = ErrorAwareRoute
+    path = "/cached/"
+
+    @app.get(path)
+    @error_map(
+        {
+            ParentError: status.HTTP_409_CONFLICT,
+            OtherClientError: status.HTTP_404_NOT_FOUND,
+        }
+    )
+    def boom() -> None:
+        raise ChildError("x")
+
+    for _ in range(3):
+        r = await client.get(path)
+        assert r.status_code == status.HTTP_409_CONFLICT
+
+    info = route_at(app, path).resolution_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (2, 1, 1)
+
+
+async def test_caches_unmapped_exception_types(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    app.router.route_class = ErrorAwareRoute
+    path = "/cached-unmapped/"
+
+    @app.get(path)
+    @error_map(
+        {
+            ClientError: status.HTTP_409_CONFLICT,
+            OtherClientError: status.HTTP_404_NOT_FOUND,
+        }
+    )
+    def boom() -> None:
+        raise PlainError("x")
+
+    for _ in range(2):
+        with pytest.raises(PlainError):
+            await client.get(path)
+
+    info = route_at(app, path).resolution_cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
+async def test_evicts_least_recently_used_type_past_cache_size(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    class TinyCacheRoute(ErrorAwareRoute):
+        resolution_cache_size: ClassVar[int] = 2
+
+    app.router.route_class = TinyCacheRoute
+    path = "/cache-eviction/"
+    dynamic_types = [type(f"Dynamic{i}Error", (ClientError,), {}) for i in range(3)]
+    raised = iter(dynamic_types + dynamic_types[:1])
+
+    @app.get(path)
+    @error_map(
+        {
+            ClientError: status.HTTP_409_CONFLICT,
+            OtherClientError: status.HTTP_404_NOT_FOUND,
+        }
+    )
+    def boom() -> None:
+        raise next(raised)("x")
+
+    for _ in range(4):
+        await client.get(path)
+
+    info = route_at(app, path).resolution_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (0, 4, 2)
+
+
+async def test_single_rule_route_is_not_counted_in_cache_info(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    app.router.route_class = ErrorAwareRoute
+    path = "/single-rule/"
+
+    @app.get(path)
+    @error_map({ParentError: status.HTTP_409_CONFLICT})
+    def boom() -> None:
+        raise ChildError("x")
+
+    for _ in range(2):
+        r = await client.get(path)
+        assert r.status_code == status.HTTP_409_CONFLICT
+
+    info = route_at(app, path).resolution_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (0, 0, 0)
@@ -1,3 +1,6 @@
+import json
+from typing import Any
+
 import httpx
 import pytest
 from fastapi import APIRouter, FastAPI
@@ -53,3 +56,26 @@ async def test_allows_redecorating_with_an_equal_map(
     r = await client.get(path)
 
     assert r.status_code == status.HTTP_409_CONFLICT
+
+
+async def test_decorator_carries_route_policy(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    router = APIRouter(route_class=ErrorAwareRoute)
+    path = "/decorator-policy/"
+
+    def tagged_dumps(body: Any) -> bytes:
+        return json.dumps({"tagged": body}).encode()
+
+    @router.get(path)
+    @error_map({ClientError: status.HTTP_409_CONFLICT}, renderer=tagged_dumps)
+    def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    r = await client.get(path)
+
+    assert r.status_code == status.HTTP_409_CONFLICT
+    assert r.json() == {"tagged": {"error": "x"}}
@@ -0,0 +1,198 @@
+import logging
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from starlette import status
+
+from fastapi_error_map import (
+    ErrorAwareRouter,
+    RouteConfigError,
+    after_response,
+    by_key,
+    first_then_every,
+    fixed_rate,
+    rule,
+    sampled,
+)
+from tests.factories import ClientError
+
+
+@pytest.mark.parametrize(("rate", "expected_calls"), [(0.0, 0), (1.0, 4)])
+async def test_samples_on_error_at_fixed_rate(
+    rate: float,
+    expected_calls: int,
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    sampler = fixed_rate(rate)
+    calls: list[str] = []
+    path = "/sampled-rate/"
+    router = ErrorAwareRouter()
+
+    def record(err: Exception) -> None:
+        calls.append(str(err))
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                on_error=sampled(record, sampler),
+            ),
+        },
+    )
+    async def boom(n: int = 0) -> None:
+        raise ClientError(str(n))
+
+    app.include_router(router)
+
+    for _ in range(4):
+        r = await client.get(path)
+        assert r.status_code == status.HTTP_409_CONFLICT
+
+    assert len(calls) == expected_calls
+    assert sampler.stats() == (expected_calls, 4 - expected_calls)
+
+
+async def test_samples_first_per_second_then_one_in_every(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("fastapi_error_map.sampling.time.monotonic", lambda: 7.5)
+    sampler = first_then_every(2, 3)
+    calls: list[str] = []
+    path = "/sampled-burst/"
+    router = ErrorAwareRouter()
+
+    def record(err: Exception) -> None:
+        calls.append(str(err))
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                on_error=sampled(record, sampler),
+            ),
+        },
+    )
+    async def boom(n: int = 0) -> None:
+        raise ClientError(str(n))
+
+    app.include_router(router)
+
+    for n in range(1, 9):
+        await client.get(path, params={"n": n})
+
+    assert calls == ["1", "2", "5", "8"]
+    assert sampler.stats() == (4, 4)
+
+
+async def test_samples_by_key_with_same_decision_everywhere(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    def trace_id(request: Request) -> str | None:
+        return request.headers.get("x-trace-id")
+
+    router = ErrorAwareRouter()
+    calls: dict[str, list[Exception]] = {"/sampled-key-a/": [], "/sampled-key-b/": []}
+
+    for path, seen in calls.items():
+
+        @router.get(
+            path,
+            error_map={
+                ClientError: rule(
+                    status.HTTP_409_CONFLICT,
+                    on_error=sampled(seen.append, by_key(trace_id, 0.5)),
+                ),
+            },
+        )
+        async def boom(n: int = 0) -> None:
+            raise ClientError(str(n))
+
+    app.include_router(router)
+
+    for n in range(20):
+        for path in ("/sampled-key-a/", "/sampled-key-b/"):
+            await client.get(
+                path, params={"n": n}, headers={"x-trace-id": f"trace-{n}"}
+            )
+
+    first, second = ([str(err) for err in seen] for seen in calls.values())
+    assert first == second
+    assert 0 < len(first) < 20
+
+
+async def test_failing_key_skips_call_and_leaves_response_intact(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    sampler = by_key(lambda request: request.headers["x-trace-id"], 1.0)
+    calls: list[Exception] = []
+    router = ErrorAwareRouter()
+    path = "/sampled-key-missing/"
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT, on_error=sampled(calls.append, sampler)
+            ),
+        },
+    )
+    async def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    with caplog.at_level(logging.WARNING, logger="fastapi_error_map"):
+        for _ in range(2):
+            r = await client.get(path)
+            assert r.status_code == status.HTTP_409_CONFLICT
+        await client.get(path, headers={"x-trace-id": "t"})
+
+    assert len(calls) == 1
+    assert sampler.stats() == (1, 2)
+    assert len(caplog.records) == 1
+    assert "response unaffected" in caplog.records[0].message
+
+
+async def test_skips_after_response_task_for_sampled_out_errors(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    router = ErrorAwareRouter()
+    path = "/sampled-background/"
+    calls: list[str] = []
+
+    def record(err: Exception) -> None:
+        calls.append(str(err))
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(
+                status.HTTP_409_CONFLICT,
+                on_error=sampled(after_response(record), fixed_rate(0.0)),
+            ),
+        },
+    )
+    async def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    r = await client.get(path)
+
+    assert r.status_code == status.HTTP_409_CONFLICT
+    assert calls == []
+
+
+def test_rejects_sampling_rate_out_of_range() -> None:
+    with pytest.raises(RouteConfigError):
+        fixed_rate(1.5)
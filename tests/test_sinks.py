@@ -0,0 +1,323 @@
+import asyncio
+import logging
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from starlette import status
+
+from fastapi_error_map import (
+    BatchSink,
+    Coalescer,
+    ErrorAwareRouter,
+    ErrorEvent,
+    rule,
+    shutdown,
+    to_threadpool,
+)
+from tests.factories import ClientError, StructuredError, UnreadableError
+
+
+async def test_flushes_full_batches_and_rest_on_shutdown(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    batches: list[list[ErrorEvent]] = []
+    sink = BatchSink(batches.append, max_batch=2, max_delay_ms=60_000)
+    path = "/batched/"
+    router = ErrorAwareRouter(on_error=sink)
+
+    @router.get(
+        path,
+        error_map={
+            StructuredError: status.HTTP_409_CONFLICT,
+        },
+    )
+    async def boom(n: int = 0) -> None:
+        raise StructuredError(f"x{n}", code=f"c{n}")
+
+    app.include_router(router)
+
+    async with app.router.lifespan_context(app):
+        for n in range(3):
+            r = await client.get(path, params={"n": n})
+            assert r.status_code == status.HTTP_409_CONFLICT
+        await asyncio.sleep(0.05)
+        assert [len(batch) for batch in batches] == [2]
+
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert [event.args for batch in batches for event in batch] == [
+        ("x0",),
+        ("x1",),
+        ("x2",),
+    ]
+    assert sink.stats() == (0, 0, 3, 0)
+
+
+async def test_flushes_partial_batch_after_delay(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    batches: list[list[ErrorEvent]] = []
+
+    async def collect(batch: list[ErrorEvent]) -> None:
+        batches.append(batch)
+
+    sink = BatchSink(collect, max_batch=100, max_delay_ms=10, attributes=("code",))
+    path = "/batched-delay/"
+    router = ErrorAwareRouter(on_error=sink)
+
+    @router.get(
+        path,
+        error_map={
+            StructuredError: status.HTTP_409_CONFLICT,
+        },
+    )
+    async def boom(n: int = 0) -> None:
+        raise StructuredError(f"x{n}", code=f"c{n}")
+
+    app.include_router(router)
+
+    await client.get(path)
+    await asyncio.sleep(0.1)
+
+    assert [[event.attributes for event in batch] for batch in batches] == [
+        [{"code": "c0"}]
+    ]
+
+
+async def test_drops_events_past_max_pending(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    batches: list[list[ErrorEvent]] = []
+    sink = BatchSink(batches.append, max_delay_ms=60_000, max_pending=2)
+    path = "/batched-full/"
+    router = ErrorAwareRouter(on_error=sink)
+
+    @router.get(
+        path,
+        error_map={
+            StructuredError: status.HTTP_409_CONFLICT,
+        },
+    )
+    async def boom(n: int = 0) -> None:
+        raise StructuredError(f"x{n}", code=f"c{n}")
+
+    app.include_router(router)
+
+    for n in range(3):
+        await client.get(path, params={"n": n})
+    await shutdown()
+
+    assert [len(batch) for batch in batches] == [2]
+    assert sink.stats().dropped == 1
+
+
+async def test_snapshot_keeps_message_and_innermost_frames(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    batches: list[list[ErrorEvent]] = []
+    sink = BatchSink(batches.append, max_delay_ms=60_000, traceback=1)
+    path = "/batched-frames/"
+    router = ErrorAwareRouter(on_error=sink)
+
+    @router.get(
+        path,
+        error_map={
+            StructuredError: status.HTTP_409_CONFLICT,
+        },
+    )
+    async def boom(n: int = 0) -> None:
+        raise StructuredError(f"x{n}", code=f"c{n}")
+
+    app.include_router(router)
+
+    await client.get(path, params={"n": 7})
+    await shutdown()
+
+    (event,) = batches[0]
+    assert event.message == "x7"
+    assert event.traceback is not None
+    assert event.traceback.count("  File ") == 1
+    assert "in boom" in event.traceback
+
+
+async def test_snapshot_survives_unreadable_attributes(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    batches: list[list[ErrorEvent]] = []
+    sink = BatchSink(batches.append, max_delay_ms=60_000, attributes=("code",))
+    path = "/batched-unreadable/"
+    router = ErrorAwareRouter(on_error=sink)
+
+    @router.get(
+        path,
+        error_map={
+            UnreadableError: status.HTTP_409_CONFLICT,
+        },
+    )
+    async def boom() -> None:
+        raise UnreadableError(UnreadableError())
+
+    app.include_router(router)
+
+    r = await client.get(path)
+    await shutdown()
+
+    assert r.status_code == status.HTTP_409_CONFLICT
+    (event,) = batches[0]
+    assert event.attributes == {"code": "<unreadable code>"}
+    assert event.args == ("<unprintable UnreadableError>",)
+
+
+class FailingSink(BatchSink):
+    def record(self, err: Exception, route: str | None, status: int | None) -> None:
+        raise RuntimeError("sink down")
+
+
+async def test_failing_recorder_leaves_response_intact(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    path = "/batched-failing/"
+    router = ErrorAwareRouter(on_error=FailingSink(lambda _batch: None))
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: status.HTTP_409_CONFLICT,
+        },
+    )
+    async def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    with caplog.at_level(logging.WARNING, logger="fastapi_error_map"):
+        r = await client.get(path)
+
+    assert r.status_code == status.HTTP_409_CONFLICT
+    assert "on_error failed" in caplog.records[0].message
+
+
+class Audit:
+    # has a record() of its own: not a recorder unless it subclasses one
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+
+    def __call__(self, err: Exception) -> None:
+        self.record(f"audit: {err}")
+
+    def record(self, line: str) -> None:
+        self.lines.append(line)
+
+
+@pytest.mark.parametrize(
+    "offload", [pytest.param(False, id="inline"), pytest.param(True, id="offloaded")]
+)
+async def test_object_with_record_method_is_plain_on_error(
+    offload: bool,
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    audit = Audit()
+    path = "/audited/"
+    router = ErrorAwareRouter(on_error=to_threadpool(audit) if offload else audit)
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: status.HTTP_409_CONFLICT,
+        },
+    )
+    async def boom() -> None:
+        raise ClientError("x")
+
+    app.include_router(router)
+
+    r = await client.get(path)
+
+    assert r.status_code == status.HTTP_409_CONFLICT
+    assert audit.lines == ["audit: x"]
+
+
+def fail_in_payments(n: int) -> None:
+    raise ClientError(f"payments {n}")
+
+
+def fail_in_inventory(n: int) -> None:
+    raise ClientError(f"inventory {n}")
+
+
+async def test_coalesces_repeats_of_same_raising_location(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    events: list[ErrorEvent] = []
+    coalescer = Coalescer(events.append, window_ms=60_000)
+    path = "/coalesced/"
+    router = ErrorAwareRouter()
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(status.HTTP_409_CONFLICT, on_error=coalescer),
+        },
+    )
+    async def boom(n: int = 0, inventory: bool = False) -> None:
+        (fail_in_inventory if inventory else fail_in_payments)(n)
+
+    app.include_router(router)
+
+    for n in range(3):
+        r = await client.get(path, params={"n": n})
+        assert r.status_code == status.HTTP_409_CONFLICT
+    await client.get(path, params={"inventory": True})
+    assert events == []
+    await shutdown()
+
+    assert [(event.args, event.repeats) for event in events] == [
+        (("payments 0",), 3),
+        (("inventory 0",), 1),
+    ]
+    assert {event.route for event in events} == {f"['GET'] {path}"}
+    assert events[0].fingerprint != events[1].fingerprint
+    assert coalescer.stats() == (0, 2, 2)
+
+
+async def test_emits_coalesced_event_when_window_closes(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    events: list[ErrorEvent] = []
+
+    async def send(event: ErrorEvent) -> None:
+        events.append(event)
+
+    coalescer = Coalescer(send, window_ms=10)
+    path = "/coalesced-window/"
+    router = ErrorAwareRouter()
+
+    @router.get(
+        path,
+        error_map={
+            ClientError: rule(status.HTTP_409_CONFLICT, on_error=coalescer),
+        },
+    )
+    async def boom(n: int = 0, inventory: bool = False) -> None:
+        (fail_in_inventory if inventory else fail_in_payments)(n)
+
+    app.include_router(router)
+
+    await client.get(path)
+    await client.get(path)
+    await asyncio.sleep(0.1)
+    await client.get(path)
+    await shutdown()
+
+    assert [event.repeats for event in events] == [2, 1]
+    assert events[0].fingerprint == events[1].fingerprint
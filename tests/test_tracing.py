@@ -0,0 +1,125 @@
+from collections.abc import Mapping
+from typing import Any
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI, HTTPException
+from starlette import status
+
+from fastapi_error_map import ErrorAwareRoute, ErrorAwareRouter, Tracer, error_map
+from tests.factories import ChildError, ParentError, PlainError
+
+
+class RecordingTracer:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, type[Exception], Mapping[str, Any]]] = []
+
+    def translated(self, err: Exception, attributes: Mapping[str, Any]) -> None:
+        self.calls.append(("translated", type(err), attributes))
+
+    def unmapped(self, err: Exception, attributes: Mapping[str, Any]) -> None:
+        self.calls.append(("unmapped", type(err), attributes))
+
+    def passed_through(self, err: Exception, attributes: Mapping[str, Any]) -> None:
+        self.calls.append(("passed_through", type(err), attributes))
+
+
+@pytest.mark.parametrize(
+    "broad", [pytest.param(False, id="narrow"), pytest.param(True, id="broad")]
+)
+async def test_reports_each_outcome_with_prebuilt_attributes(
+    broad: bool,
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    tracer = RecordingTracer()
+    assert isinstance(tracer, Tracer)
+    router = ErrorAwareRouter(tracer=tracer, warn_on_unmapped=False)
+    path = "/traced/"
+    mapping: dict[type[Exception], int] = {ParentError: status.HTTP_409_CONFLICT}
+    if broad:  # an ancestor of HTTPException: checked before resolving
+        mapping[Exception] = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+    @router.get(path, error_map=mapping)
+    def boom(kind: str) -> None:
+        if kind == "child":
+            raise ChildError("x")
+        if kind == "http":
+            raise HTTPException(status.HTTP_404_NOT_FOUND)
+        raise PlainError("x")
+
+    app.include_router(router)
+
+    for kind in ("child", "child", "http"):
+        await client.get(path, params={"kind": kind})
+    if broad:
+        await client.get(path, params={"kind": "plain"})
+    else:
+        with pytest.raises(PlainError):
+            await client.get(path, params={"kind": "plain"})
+
+    route = f"['GET'] {path}"
+    assert [(event, exc_type) for event, exc_type, _ in tracer.calls] == [
+        ("translated", ChildError),
+        ("translated", ChildError),
+        ("passed_through", HTTPException),
+        ("translated" if broad else "unmapped", PlainError),
+    ]
+    first, second, passed, last = (attrs for _, _, attrs in tracer.calls)
+    assert first is second
+    assert dict(first) == {
+        "error_map.route": route,
+        "error_map.outcome": "translated",
+        "error_map.rule": "tests.factories.ParentError",
+        "http.response.status_code": status.HTTP_409_CONFLICT,
+    }
+    assert dict(passed) == {
+        "error_map.route": route,
+        "error_map.outcome": "passed_through",
+    }
+    if not broad:
+        assert dict(last) == {"error_map.route": route, "error_map.outcome": "unmapped"}
+
+
+async def test_decorator_carries_tracer(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    tracer = RecordingTracer()
+    router = APIRouter(route_class=ErrorAwareRoute)
+    path = "/traced-decorator/"
+
+    @router.get(path)
+    @error_map({ParentError: status.HTTP_409_CONFLICT}, tracer=tracer)
+    def boom() -> None:
+        raise ChildError("x")
+
+    app.include_router(router)
+
+    await client.get(path)
+
+    assert [(event, exc_type) for event, exc_type, _ in tracer.calls] == [
+        ("translated", ChildError),
+    ]
+
+
+async def test_failing_tracer_leaves_response_intact(
+    app: FastAPI,
+    client: httpx.AsyncClient,
+) -> None:
+    class BrokenTracer(RecordingTracer):
+        def translated(self, err: Exception, attributes: Mapping[str, Any]) -> None:
+            raise RuntimeError("collector down")
+
+    router = ErrorAwareRouter(tracer=BrokenTracer())
+    path = "/traced-broken/"
+
+    @router.get(path, error_map={ParentError: status.HTTP_409_CONFLICT})
+    def boom() -> None:
+        raise ParentError("x")
+
+    app.include_router(router)
+
+    r = await client.get(path)
+
+    assert r.status_code == status.HTTP_409_CONFLICT
@@ -1,8 +1,16 @@
 import httpx
+import pytest
 from fastapi import FastAPI
 from starlette import status
 
-from fastapi_error_map import ErrorAwareRouter, rule, structured
+from fastapi_error_map import (
+    ConstantTranslator,
+    ErrorAwareRouter,
+    TranslatorFactory,
+    rule,
+    simple,
+    structured,
+)
 from tests.factories import (
     ChildError,
     MalformedError,
@@ -361,3 +369,41 @@ async def test_rule_translator_overrides_router_factory(
     r = await client.get(path)
 
     assert r.json() == "brewing"
+
+
+@pytest.mark.parametrize(
+    ("factory", "status_code", "expected"),
+    [
+        pytest.param(
+            simple(),
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            {"error": "Internal server error"},
+            id="simple-5xx",
+        ),
+        pytest.param(simple(), status.HTTP_404_NOT_FOUND, None, id="simple-4xx"),
+        pytest.param(
+            structured(),
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            {
+                "code": "HTTP_503_SERVICE_UNAVAILABLE",
+                "message": "Internal server error",
+            },
+            id="structured-5xx",
+        ),
+        pytest.param(
+            structured(exposed_5xx_types=(ServerError,)),
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            None,
+            id="structured-5xx-exposed",
+        ),
+    ],
+)
+def test_builtin_translators_declare_constant_body_only_for_opaque_5xx(
+    factory: TranslatorFactory,
+    status_code: int,
+    expected: object,
+) -> None:
+    translator = factory(status_code)
+
+    assert isinstance(translator, ConstantTranslator)
+    assert translator.constant_body() == expected